@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+GitHub Trending 页面解析性能对比
+
+对 benchmarks/fixtures 下保存的 Trending 页面分别运行完整文档树解析（bs4）
+与快速解析路径（fast），校验两者结果一致并输出平均耗时。
+
+用法:
+    python benchmarks/bench_parser.py            # 使用已保存的页面
+    python benchmarks/bench_parser.py --fetch    # 先抓取最新页面保存为fixture
+    python benchmarks/bench_parser.py -n 50      # 指定每个页面的重复次数
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+sys.path.append(os.path.join(ROOT, 'scripts'))
+
+from github_trending import parse_trending_page, TRENDING_RANGES, _FAST_PARSER
+
+def fetch_fixtures():
+    """抓取当前的Trending页面并保存为fixture"""
+    from http_client import get_session
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for since in TRENDING_RANGES:
+        res = get_session().get(f"https://github.com/trending?since={since}",
+                                headers={"User-Agent":"Mozilla/5.0"})
+        res.raise_for_status()
+        path = os.path.join(FIXTURE_DIR, f"trending-{since}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(res.text)
+        print(f"已保存: {path}")
+
+def time_backend(html, backend, repeat):
+    """返回指定解析后端的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_trending_page(html, backend=backend)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub Trending 页面解析性能对比")
+    parser.add_argument('-n', '--repeat', type=int, default=20, help="每个页面的重复次数")
+    parser.add_argument('--fetch', action='store_true', help="先抓取最新页面保存为fixture")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures()
+
+    fixtures = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    if not fixtures:
+        print(f"未找到fixture页面: {FIXTURE_DIR}")
+        return 1
+
+    print(f"快速解析路径使用的解析器: {_FAST_PARSER}")
+    print(f"{'fixture':<28}{'项目数':>6}{'bs4 (ms)':>12}{'fast (ms)':>12}{'加速比':>8}")
+    total_full = total_fast = 0.0
+    for path in fixtures:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        # 两个后端的结果必须完全一致
+        expected = parse_trending_page(html, backend='bs4')
+        actual = parse_trending_page(html, backend='fast')
+        if expected != actual:
+            print(f"{os.path.basename(path)}: 解析结果不一致")
+            return 1
+
+        full = time_backend(html, 'bs4', args.repeat)
+        fast = time_backend(html, 'fast', args.repeat)
+        total_full += full
+        total_fast += fast
+        print(f"{os.path.basename(path):<28}{len(expected[0]):>6}{full:>12.2f}{fast:>12.2f}{full / fast:>7.1f}x")
+
+    print(f"{'合计':<28}{'':>6}{total_full:>12.2f}{total_fast:>12.2f}{total_full / total_fast:>7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,33 @@
+import hashlib
+import json
 import os
 import re
-import dashscope
-from dashscope import Generation
-from cache_manager import get_cached_summary, cache_summary
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from cache_manager import (get_cached_summary, lookup_cached_summaries, cache_summary,
+                           cache_failed_summary, get_retry_queue, STATE_STALE, STATE_FAILED)
+from llm_backends import get_backend
+from project import Project
+from rate_limiter import TokenBucket
+
+# 提示词模板版本，修改 build_prompt / build_batch_prompt 的输出格式时需递增
+PROMPT_VERSION = 1
+
+# 并发调用LLM的最大请求数
+SUMMARY_MAX_WORKERS = int(os.environ.get("SUMMARY_MAX_WORKERS", "8"))
+# 每分钟最大LLM请求数（小于等于0时不限速）
+SUMMARY_RPM = int(os.environ.get("SUMMARY_RPM", "60"))
+# 每次运行最多在后台重试的失败条目数
+SUMMARY_RETRY_LIMIT = int(os.environ.get("SUMMARY_RETRY_LIMIT", "20"))
+# 批量模式下每个提示词包含的项目数（小于等于1时关闭批量模式）
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", "0"))
+
+# 批量模式中JSON字段与摘要小节的对应关系
+SUMMARY_SECTIONS = (
+    ('background', '【项目背景】'),
+    ('intro', '【核心介绍】'),
+    ('features', '【关键特性】')
+)
 
 def clean_md_to_html(text):
     """
@@ -22,44 +47,296 @@ def clean_md_to_html(text):
     text = text.replace('【关键特性】', '<strong style="color:#1a1a1a;">【关键特性】</strong>')
     return text
 
+def summary_cache_key(p):
+    """
+    计算项目摘要的缓存键
+
+    缓存键由进入提示词的全部输入（项目名、描述、提示词版本、后端模型）的哈希构成，
+    输入不变时摘要长期有效，项目描述变更后自动重新生成。
+
+    Args:
+        p (Project): 项目记录
+
+    Returns:
+        str: 缓存键
+    """
+    payload = json.dumps([p.name, p.desc, PROMPT_VERSION, get_backend().cache_id], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_prompt(p):
+    """
+    构造单个项目的摘要提示词
+
+    Args:
+        p (Project): 项目记录
+
+    Returns:
+        str: 提示词
+    """
+    return (
+        f"你是一个资深架构师。请深入分析GitHub项目 '{p.name}'。描述：{p.desc}。\n"
+        "请严格按以下格式输出（中文）：\n"
+        "【项目背景】一句话说明该项目解决了什么行业痛点。\n"
+        "【核心介绍】两句话说明其技术实现方案或定位。\n"
+        "【关键特性】列举2个核心技术亮点，重要词汇请用双星号加粗。"
+    )
+
+def build_batch_prompt(projects):
+    """
+    构造包含多个项目的批量摘要提示词，要求以项目名为键返回JSON
+
+    Args:
+        projects (list): Project列表
+
+    Returns:
+        str: 提示词
+    """
+    items = "\n".join(f"- '{p.name}'：{p.desc}" for p in projects)
+    return (
+        "你是一个资深架构师。请深入分析以下GitHub项目（项目名：描述）：\n"
+        f"{items}\n"
+        "请只输出一个JSON对象，键为项目名，值为包含以下字段的对象（中文）：\n"
+        "background：一句话说明该项目解决了什么行业痛点。\n"
+        "intro：两句话说明其技术实现方案或定位。\n"
+        "features：列举2个核心技术亮点，重要词汇请用双星号加粗。"
+    )
+
+def parse_batch_response(content, projects):
+    """
+    将批量模式返回的JSON解析为各项目的摘要
+
+    Args:
+        content (str): 模型返回内容
+        projects (list): 提示词中包含的Project列表
+
+    Returns:
+        dict: 项目名 -> 摘要，仅包含字段完整的项目
+    """
+    # 去掉模型可能包裹的 ```json 代码块
+    content = re.sub(r'^\s*```(?:json)?|```\s*$', '', content.strip())
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    summaries = {}
+    for p in projects:
+        entry = data.get(p.name)
+        if not isinstance(entry, dict):
+            continue
+        parts = [entry.get(key) for key, _ in SUMMARY_SECTIONS]
+        if not all(isinstance(part, str) and part.strip() for part in parts):
+            continue
+        summaries[p.name] = "\n".join(
+            f"{title}{part.strip()}" for (_, title), part in zip(SUMMARY_SECTIONS, parts)
+        )
+    return summaries
+
+def call_llm(prompt):
+    """
+    调用当前配置的LLM后端
+
+    Args:
+        prompt (str): 提示词
+
+    Returns:
+        str: 模型返回内容，调用失败时返回None
+    """
+    return get_backend().complete(prompt)
+
+def fallback_summary(p):
+    """
+    LLM调用失败时使用的兜底摘要
+
+    Args:
+        p (Project): 项目记录
+
+    Returns:
+        str: 基于项目描述的摘要
+    """
+    return f"【项目背景】{p.desc}"
+
+def generate_summary(p):
+    """
+    调用LLM生成项目摘要（不读写缓存）
+
+    Args:
+        p (Project): 项目记录
+
+    Returns:
+        str: 项目摘要，调用失败时返回None
+    """
+    print(f"调用LLM生成摘要: {p.name}")
+    return call_llm(build_prompt(p))
+
+def generate_batch_summaries(projects, limiter=None):
+    """
+    用一次LLM调用为多个项目生成摘要，解析失败的项目回退为单项目调用
+
+    Args:
+        projects (list): Project列表
+        limiter (TokenBucket, optional): 请求速率限制器
+
+    Returns:
+        dict: 项目名 -> 摘要（调用失败时为None）
+    """
+    print(f"批量调用LLM生成摘要: {', '.join(p.name for p in projects)}")
+    if limiter:
+        limiter.acquire()
+    content = call_llm(build_batch_prompt(projects))
+    summaries = parse_batch_response(content, projects) if content is not None else {}
+
+    for p in projects:
+        if p.name not in summaries:
+            if limiter:
+                limiter.acquire()
+            summaries[p.name] = generate_summary(p)
+    return summaries
+
 def get_rich_summary(p):
     """
-    使用DashScope模型为GitHub项目生成详细摘要（带缓存机制）
+    使用LLM为GitHub项目生成详细摘要（带缓存机制）
     
     Args:
-        p (dict): 包含项目信息的字典
+        p (Project): 项目记录
     
     Returns:
         str: 项目摘要
     """
     # 首先检查缓存
-    cached_summary = get_cached_summary(p['name'])
+    cache_key = summary_cache_key(p)
+    cached_summary = get_cached_summary(cache_key)
     if cached_summary:
-        print(f"使用缓存的摘要: {p['name']}")
+        print(f"使用缓存的摘要: {p.name}")
         return cached_summary
     
-    # 缓存未命中，调用LLM生成摘要
-    print(f"调用LLM生成摘要: {p['name']}")
-    dashscope.api_key = os.environ.get("DASHSCOPE_API_KEY")
-    prompt = (
-        f"你是一个资深架构师。请深入分析GitHub项目 '{p['name']}'。描述：{p['desc']}。\n"
-        "请严格按以下格式输出（中文）：\n"
-        "【项目背景】一句话说明该项目解决了什么行业痛点。\n"
-        "【核心介绍】两句话说明其技术实现方案或定位。\n"
-        "【关键特性】列举2个核心技术亮点，重要词汇请用双星号加粗。"
-    )
-    try:
-        resp = Generation.call(model="qwen-max", prompt=prompt, result_format='message')
-        if resp.status_code == 200:
-            summary = resp.output.choices[0].message.content
-            # 缓存生成的摘要
-            cache_summary(p['name'], summary)
+    # 缓存未命中，调用LLM生成摘要并缓存
+    summary = generate_summary(p)
+    if summary is None:
+        summary = fallback_summary(p)
+        cache_failed_summary(cache_key, summary, p)
+    else:
+        cache_summary(cache_key, summary, p)
+    return summary
+
+class SummarizationStage:
+    """
+    渲染前的摘要生成阶段
+
+    - 缓存未命中（或失败条目已超过有效期）的项目在 run 中并发生成，渲染前等待完成；
+    - 已过期的摘要先继续使用，同时在后台刷新（stale-while-revalidate）；
+    - 失败的兜底摘要及重试队列中的条目在后台重新生成。
+    后台任务在 wait 中收尾，结果写入缓存供下次运行使用。
+    """
+
+    def __init__(self, max_workers=None, rpm=None, batch_size=None, retry_limit=None):
+        """
+        Args:
+            max_workers (int, optional): 最大并发请求数，默认为SUMMARY_MAX_WORKERS
+            rpm (int, optional): 每分钟最大请求数，默认为SUMMARY_RPM，小于等于0时不限速
+            batch_size (int, optional): 每次调用包含的项目数，默认为SUMMARY_BATCH_SIZE
+            retry_limit (int, optional): 每次运行最多重试的失败条目数，默认为SUMMARY_RETRY_LIMIT
+        """
+        self.max_workers = max_workers or SUMMARY_MAX_WORKERS
+        rpm = SUMMARY_RPM if rpm is None else rpm
+        batch_size = SUMMARY_BATCH_SIZE if batch_size is None else batch_size
+        self.batch_size = batch_size if batch_size > 1 else 1
+        self.retry_limit = SUMMARY_RETRY_LIMIT if retry_limit is None else retry_limit
+        self.limiter = TokenBucket.per_minute(rpm, capacity=self.max_workers) if rpm > 0 else None
+        self._executor = None
+        self._background = []
+        # 已有可用旧摘要的缓存键：刷新失败时保留旧摘要，不写入失败条目
+        self._stale_keys = set()
+
+    def _task(self, jobs):
+        """执行一组 (缓存键, Project) 任务，返回 [(缓存键, Project, 摘要或None)]"""
+        if len(jobs) > 1:
+            summaries = generate_batch_summaries([p for _, p in jobs], self.limiter)
+            return [(key, p, summaries.get(p.name)) for key, p in jobs]
+        key, p = jobs[0]
+        if self.limiter:
+            self.limiter.acquire()
+        return [(key, p, generate_summary(p))]
+
+    def _submit(self, jobs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        size = self.batch_size
+        return [self._executor.submit(self._task, jobs[i:i + size]) for i in range(0, len(jobs), size)]
+
+    def _store(self, key, p, summary):
+        """写入生成结果，返回本次应使用的摘要"""
+        if summary is not None:
+            cache_summary(key, summary, p)
             return summary
-        fallback_summary = f"【项目背景】{p['desc']}"
-        cache_summary(p['name'], fallback_summary)
-        return fallback_summary
-    except Exception as e:
-        print(f"LLM调用失败: {e}")
-        fallback_summary = f"【项目背景】{p['desc']}"
-        cache_summary(p['name'], fallback_summary)
-        return fallback_summary
\ No newline at end of file
+        if key not in self._stale_keys:
+            cache_failed_summary(key, fallback_summary(p), p)
+        return fallback_summary(p)
+
+    def run(self, projects):
+        """
+        生成项目摘要，返回渲染所需的完整摘要表
+
+        Args:
+            projects (list): Project列表（应已去重）
+
+        Returns:
+            dict: 项目名 -> 摘要
+        """
+        keys = {p.name: summary_cache_key(p) for p in projects}
+        cached = lookup_cached_summaries(keys.values())
+
+        summaries = {}
+        misses = []
+        refresh = []
+        for p in projects:
+            key = keys[p.name]
+            if key not in cached:
+                misses.append((key, p))
+                continue
+            summary, state = cached[key]
+            summaries[p.name] = summary
+            if state == STATE_STALE:
+                self._stale_keys.add(key)
+                refresh.append((key, p))
+            elif state == STATE_FAILED:
+                refresh.append((key, p))
+
+        # 重试队列：失败条目不论是否出现在本次榜单中都会在后台重新生成（已在前台或后台任务中的跳过）
+        queued_keys = {key for key, _ in misses + refresh}
+        retries = [(key, Project.from_record(record))
+                   for key, record in get_retry_queue(self.retry_limit)
+                   if key not in queued_keys]
+
+        print(f"摘要缓存命中 {len(summaries)} 个，需调用LLM {len(misses)} 个，"
+              f"后台刷新 {len(refresh)} 个，重试队列 {len(retries)} 个")
+
+        # 先提交前台任务，保证渲染所需的摘要优先生成
+        foreground = self._submit(misses) if misses else []
+        if refresh or retries:
+            self._background.extend(self._submit(refresh + retries))
+
+        # 缓存只在主线程中写入
+        for future in as_completed(foreground):
+            for key, p, summary in future.result():
+                summaries[p.name] = self._store(key, p, summary)
+        return summaries
+
+    def wait(self):
+        """等待后台刷新和重试完成并写入缓存"""
+        refreshed = failed = 0
+        for future in as_completed(self._background):
+            for key, p, summary in future.result():
+                self._store(key, p, summary)
+                if summary is None:
+                    failed += 1
+                else:
+                    refreshed += 1
+        if self._background:
+            print(f"后台摘要刷新完成: 成功 {refreshed} 个, 失败 {failed} 个")
+        self._background = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
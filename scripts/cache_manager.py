@@ -1,73 +1,375 @@
+import atexit
 import json
 import os
-import time
-from datetime import datetime, timedelta
+import tempfile
+import threading
+from datetime import datetime
 
 # 缓存文件路径
 CACHE_FILE = "data/project_summaries_cache.json"
-# 缓存过期时间（7天）
-CACHE_EXPIRY_DAYS = 7
+# 缓存过期时间（默认90天）：缓存键包含提示词的全部输入，输入变化时自动失效，因此有效期可以较长
+CACHE_EXPIRY_DAYS = int(os.environ.get("SUMMARY_CACHE_TTL_DAYS", "90"))
+# 过期后仍可继续提供旧摘要（同时后台刷新）的宽限期
+STALE_GRACE_DAYS = int(os.environ.get("SUMMARY_CACHE_STALE_DAYS", "30"))
+# 生成失败的兜底摘要的有效期（小时）
+FAILURE_TTL_HOURS = float(os.environ.get("SUMMARY_FAILURE_TTL_HOURS", "6"))
+# 同一条目连续生成失败的最大次数，达到后不再进入后台重试，兜底摘要过期后作为未命中重新生成
+SUMMARY_MAX_FAILURES = int(os.environ.get("SUMMARY_MAX_FAILURES", "5"))
+# 缓存容量上限：条目数与序列化后的字节数（小于等于0表示不限制），超出时按最近命中时间淘汰
+CACHE_MAX_ENTRIES = int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_BYTES = int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", "0"))
+# 缓存后端：'json'（默认）或 'sqlite'
+CACHE_BACKEND = os.environ.get("SUMMARY_CACHE_BACKEND", "json")
 
-def init_cache():
-    """初始化缓存目录和文件"""
-    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-    if not os.path.exists(CACHE_FILE):
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump({}, f)
+# 条目状态：正常摘要 / 生成失败的兜底摘要
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
 
-def load_cache():
+# 查询结果状态：新鲜 / 已过期但可继续使用（需后台刷新）/ 失败兜底（需重试）/ 失败兜底（不再后台重试）
+STATE_FRESH = 'fresh'
+STATE_STALE = 'stale'
+STATE_FAILED = 'failed'
+STATE_EXHAUSTED = 'exhausted'
+
+def load_cache(path=None):
     """加载缓存数据"""
     try:
-        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+        with open(path or CACHE_FILE, 'r', encoding='utf-8') as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
-        # 如果文件不存在或损坏，初始化空缓存
-        init_cache()
+        # 如果文件不存在或损坏，返回空缓存
         return {}
 
-def save_cache(cache_data):
-    """保存缓存数据"""
+def save_cache(cache_data, path=None):
+    """
+    保存缓存数据
+
+    先写入同目录下的临时文件再原子替换，写入中断时不会留下损坏的缓存文件。
+    """
+    path = path or CACHE_FILE
     try:
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cache_data, f, ensure_ascii=False, indent=2)
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.cache-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cache_data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
     except Exception as e:
         print(f"保存缓存失败: {e}")
 
-def is_cache_expired(timestamp):
-    """检查缓存是否过期"""
-    try:
-        cache_time = datetime.fromisoformat(timestamp)
-        return datetime.now() - cache_time > timedelta(days=CACHE_EXPIRY_DAYS)
-    except:
-        # 如果时间戳格式不正确，认为已过期
+def entry_state(status, age_seconds, failures=1):
+    """
+    根据条目状态和存活时间判断查询结果状态
+
+    Args:
+        status (str): 条目状态（STATUS_OK / STATUS_FAILED）
+        age_seconds (float): 条目存活时间（秒），无法确定时为None
+        failures (int): 失败条目的连续失败次数
+
+    Returns:
+        str: STATE_FRESH / STATE_STALE / STATE_FAILED / STATE_EXHAUSTED，条目已不可用时返回None
+
+    失败条目不论失败次数都只在 FAILURE_TTL_HOURS 内可用，之后按未命中处理；
+    达到 SUMMARY_MAX_FAILURES 次的条目在有效期内返回 STATE_EXHAUSTED，不再安排后台重试。
+    """
+    if age_seconds is None:
+        return None
+    if status == STATUS_FAILED:
+        if age_seconds >= FAILURE_TTL_HOURS * 3600:
+            return None
+        return STATE_EXHAUSTED if failures >= SUMMARY_MAX_FAILURES else STATE_FAILED
+    if age_seconds <= CACHE_EXPIRY_DAYS * 86400:
+        return STATE_FRESH
+    if age_seconds <= (CACHE_EXPIRY_DAYS + STALE_GRACE_DAYS) * 86400:
+        return STATE_STALE
+    return None
+
+def is_entry_expired(status, age_seconds, first_failure_age=None):
+    """
+    判断条目是否可以被压缩清理
+
+    正常摘要超过有效期加宽限期后清理；失败条目按首次失败时间计算，超过有效期后清理
+    （每次重试失败都会更新写入时间，不能以写入时间为准）。
+    """
+    if status == STATUS_FAILED and first_failure_age is not None:
+        age_seconds = first_failure_age
+    if age_seconds is None:
         return True
+    if status == STATUS_FAILED:
+        return age_seconds > CACHE_EXPIRY_DAYS * 86400
+    return age_seconds > (CACHE_EXPIRY_DAYS + STALE_GRACE_DAYS) * 86400
+
+def _file_size(*paths):
+    """计算文件总大小（不存在的文件按0计）"""
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+def _entry_age(timestamp):
+    """计算ISO格式时间戳距今的秒数，格式错误时返回None"""
+    try:
+        return (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+class SummaryCache:
+    """
+    内存中的摘要缓存（写回模式）
+
+    每个进程只读取一次缓存文件，查询直接命中内存；新增和删除的条目记为脏数据，
+    在 flush 时与磁盘上的最新内容合并后一次性原子写回。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or CACHE_FILE
+        self._data = None
+        self._dirty = set()
+        self._deleted = set()
+        self._lock = threading.Lock()
+
+    def _entries(self):
+        if self._data is None:
+            self._data = load_cache(self.path)
+        return self._data
+
+    def lookup_many(self, keys):
+        """
+        批量查询摘要及其状态，已不可用的正常条目会被标记删除
+
+        失败条目保留到压缩时清理，以便累计连续失败次数。
+
+        Args:
+            keys (list): 缓存键列表
+
+        Returns:
+            dict: 缓存键 -> (摘要, 状态)，仅包含可用的条目
+        """
+        result = {}
+        now = datetime.now().isoformat()
+        with self._lock:
+            entries = self._entries()
+            for key in keys:
+                project_data = entries.get(key)
+                if project_data is None:
+                    continue
+                status = project_data.get('status', STATUS_OK)
+                state = entry_state(status, _entry_age(project_data.get('timestamp', '')),
+                                    project_data.get('failures', 1))
+                if state:
+                    result[key] = (project_data.get('summary', ''), state)
+                    # 记录最近命中时间，用于LRU淘汰
+                    project_data['last_hit'] = now
+                    self._dirty.add(key)
+                elif status != STATUS_FAILED:
+                    # 缓存过期，从缓存中删除
+                    self._remove(key)
+        return result
+
+    def get(self, key):
+        """获取可用的摘要"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        批量获取可用的摘要
+
+        Returns:
+            dict: 缓存键 -> 摘要（仅包含命中的条目）
+        """
+        return {key: summary for key, (summary, _) in self.lookup_many(keys).items()}
+
+    def put(self, key, summary, status=STATUS_OK, project=None):
+        """写入摘要（仅修改内存，flush 时落盘）"""
+        self.put_many({key: summary}, status, {key: project} if project else None)
+
+    def put_many(self, summaries, status=STATUS_OK, projects=None):
+        """
+        批量写入摘要
 
-def get_cached_summary(project_name):
+        Args:
+            summaries (dict): 缓存键 -> 摘要
+            status (str): 条目状态，STATUS_FAILED 表示生成失败的兜底摘要
+            projects (dict, optional): 缓存键 -> Project，失败条目据此在后续运行中重试
+        """
+        timestamp = datetime.now().isoformat()
+        with self._lock:
+            entries = self._entries()
+            for key, summary in summaries.items():
+                previous = entries.get(key) or {}
+                entry = {
+                    'summary': summary,
+                    'timestamp': timestamp,
+                    'status': status
+                }
+                if status == STATUS_FAILED:
+                    # 累计连续失败次数，保留首次失败时间
+                    if previous.get('status') == STATUS_FAILED:
+                        entry['failures'] = previous.get('failures', 1) + 1
+                        entry['first_failed_at'] = previous.get('first_failed_at') or previous.get('timestamp', timestamp)
+                    else:
+                        entry['failures'] = 1
+                        entry['first_failed_at'] = timestamp
+                entries[key] = entry
+                if projects and projects.get(key):
+                    entries[key]['project'] = projects[key].to_record()
+                self._dirty.add(key)
+                self._deleted.discard(key)
+
+    def retry_queue(self, limit=None):
+        """
+        获取待重试的失败条目（不含已达到最大失败次数的条目）
+
+        Args:
+            limit (int, optional): 最多返回的条目数
+
+        Returns:
+            list: (缓存键, Project记录) 列表，按失败时间从早到晚排序
+        """
+        with self._lock:
+            failed = sorted(
+                (data.get('timestamp', ''), key, data['project'])
+                for key, data in self._entries().items()
+                if data.get('status') == STATUS_FAILED and data.get('project')
+                and data.get('failures', 1) < SUMMARY_MAX_FAILURES
+            )
+        return [(key, record) for _, key, record in failed[:limit]]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries())
+
+    def compact(self, max_entries=None, max_bytes=None):
+        """
+        压缩缓存：一次性清理所有过期条目，再按最近命中时间淘汰超出容量的条目，并写回磁盘
+
+        Args:
+            max_entries (int, optional): 最大条目数，默认为CACHE_MAX_ENTRIES
+            max_bytes (int, optional): 最大字节数，默认为CACHE_MAX_BYTES
+
+        Returns:
+            dict: expired（清理的过期条目数）、evicted（淘汰的条目数）、
+                  bytes_before / bytes_after（压缩前后的文件大小）
+        """
+        max_entries = CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        bytes_before = _file_size(self.path)
+
+        with self._lock:
+            entries = self._entries()
+            expired = [key for key, data in entries.items()
+                       if is_entry_expired(data.get('status', STATUS_OK),
+                                           _entry_age(data.get('timestamp', '')),
+                                           _entry_age(data['first_failed_at']) if data.get('first_failed_at') else None)]
+            for key in expired:
+                self._remove(key)
+
+            # 按最近命中时间（从未命中的按写入时间）从旧到新淘汰
+            order = sorted(entries, key=lambda k: entries[k].get('last_hit') or entries[k].get('timestamp', ''))
+            sizes = {key: len(json.dumps(entries[key], ensure_ascii=False).encode('utf-8')) for key in order}
+            total_bytes = sum(sizes.values())
+            evicted = 0
+            for key in order:
+                over_entries = max_entries > 0 and len(entries) > max_entries
+                over_bytes = max_bytes > 0 and total_bytes > max_bytes
+                if not over_entries and not over_bytes:
+                    break
+                total_bytes -= sizes[key]
+                self._remove(key)
+                evicted += 1
+
+        self.flush()
+        return {
+            'expired': len(expired),
+            'evicted': evicted,
+            'bytes_before': bytes_before,
+            'bytes_after': _file_size(self.path)
+        }
+
+    def _remove(self, key):
+        """从内存中删除条目并标记删除（调用方需持有锁）"""
+        del self._data[key]
+        self._dirty.discard(key)
+        self._deleted.add(key)
+
+    def flush(self):
+        """
+        将脏数据写回磁盘
+
+        Returns:
+            int: 写回的变更条目数
+        """
+        with self._lock:
+            if not self._dirty and not self._deleted:
+                return 0
+
+            # 与磁盘上的最新内容合并，避免覆盖其他进程写入的条目
+            merged = load_cache(self.path)
+            for project_name in self._deleted:
+                merged.pop(project_name, None)
+            for project_name in self._dirty:
+                merged[project_name] = self._data[project_name]
+            save_cache(merged, self.path)
+
+            changed = len(self._dirty) + len(self._deleted)
+            self._data = merged
+            self._dirty.clear()
+            self._deleted.clear()
+            return changed
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+def get_summary_cache():
+    """
+    获取进程内共享的摘要缓存，进程退出时自动写回
+
+    Returns:
+        SummaryCache | SqliteSummaryCache: 由 SUMMARY_CACHE_BACKEND 决定的缓存实现
+    """
+    global _summary_cache
+    if _summary_cache is None:
+        with _summary_cache_lock:
+            if _summary_cache is None:
+                if CACHE_BACKEND == 'sqlite':
+                    from sqlite_cache import SqliteSummaryCache
+                    _summary_cache = SqliteSummaryCache()
+                else:
+                    _summary_cache = SummaryCache()
+                atexit.register(_summary_cache.flush)
+    return _summary_cache
+
+def get_cached_summary(key):
     """获取项目的缓存摘要"""
-    cache = load_cache()
-    
-    # 检查项目是否在缓存中
-    if project_name in cache:
-        project_data = cache[project_name]
-        
-        # 检查缓存是否过期
-        if not is_cache_expired(project_data.get('timestamp', '')):
-            return project_data.get('summary', None)
-        else:
-            # 缓存过期，从缓存中删除
-            del cache[project_name]
-            save_cache(cache)
-    
-    return None
+    return get_summary_cache().get(key)
+
+def lookup_cached_summaries(keys):
+    """批量查询项目的缓存摘要及其状态（缓存键 -> (摘要, 状态)）"""
+    return get_summary_cache().lookup_many(keys)
 
-def cache_summary(project_name, summary):
+def cache_summary(key, summary, project=None):
     """缓存项目摘要"""
-    cache = load_cache()
-    
-    # 更新或添加项目摘要
-    cache[project_name] = {
-        'summary': summary,
-        'timestamp': datetime.now().isoformat()
-    }
-    
-    save_cache(cache)
\ No newline at end of file
+    get_summary_cache().put(key, summary, STATUS_OK, project)
+
+def cache_failed_summary(key, summary, project=None):
+    """缓存生成失败的兜底摘要（短有效期，并进入重试队列）"""
+    get_summary_cache().put(key, summary, STATUS_FAILED, project)
+
+def get_retry_queue(limit=None):
+    """获取待重试的失败条目列表 [(缓存键, Project记录)]"""
+    return get_summary_cache().retry_queue(limit)
+
+def compact_cache():
+    """压缩摘要缓存并输出回收的空间"""
+    stats = get_summary_cache().compact()
+    print(f"摘要缓存压缩完成: 清理过期 {stats['expired']} 条, 淘汰 {stats['evicted']} 条, "
+          f"{stats['bytes_before']} → {stats['bytes_after']} 字节, "
+          f"回收 {stats['bytes_before'] - stats['bytes_after']} 字节")
+    return stats
+
+def flush_cache():
+    """将本次运行的缓存变更写回磁盘"""
+    changed = get_summary_cache().flush()
+    if changed:
+        print(f"摘要缓存已写回，共 {changed} 条变更")
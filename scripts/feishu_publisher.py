@@ -1,9 +1,23 @@
 import os
-import requests
 import json
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from feishu_token import get_token_provider
+from http_client import RETRYABLE_STATUS_CODES, get_session, request_not_sent
+from rate_limiter import TokenBucket
+
+# 并发发送消息的最大线程数
+FEISHU_SEND_WORKERS = int(os.environ.get("FEISHU_SEND_WORKERS", "10"))
+# 每秒最大发送请求数（飞书发送消息接口的应用级限频为 50 次/秒）
+FEISHU_SEND_QPS = float(os.environ.get("FEISHU_SEND_QPS", "50"))
+# 触发限频或服务端错误时的最大重试次数
+FEISHU_SEND_RETRIES = int(os.environ.get("FEISHU_SEND_RETRIES", "3"))
+# 表示触发限频的业务错误码（99991400：应用级请求频率超限；230020：消息发送频率超限）
+FEISHU_RATE_LIMIT_CODES = {99991400, 230020}
+
 # 导入GitHub工具模块
 try:
     import scripts.github_utils
@@ -30,22 +44,11 @@ def get_trending_page_url(current_date=None):
     date_str = current_date.strftime('%Y-%m-%d')
     return f"{base_url}/trending-{date_str}.html"
 
-# 缓存tenant_access_token及其过期时间
-_tenant_access_token = None
-_token_expires_at = 0
-
 def get_tenant_access_token():
     """
     获取飞书租户访问令牌(tenant_access_token)
-    使用App ID和App Secret获取，有效期2小时
+    使用App ID和App Secret获取，令牌及其过期时间缓存在进程外的缓存文件中（见 feishu_token）
     """
-    global _tenant_access_token, _token_expires_at
-    
-    # 检查缓存的token是否 still有效 (提前5分钟过期)
-    current_time = time.time()
-    if _tenant_access_token and _token_expires_at > current_time + 300:
-        return _tenant_access_token
-    
     app_id = os.environ.get("FEISHU_APP_ID")
     app_secret = os.environ.get("FEISHU_APP_SECRET")
     
@@ -53,48 +56,108 @@ def get_tenant_access_token():
         print("未配置飞书App ID或App Secret")
         return None
     
-    url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal/"
-    
+    return get_token_provider(app_id, app_secret).get_token()
+
+def _retry_after(response):
+    """飞书返回的限频重置时间（x-ogw-ratelimit-reset）或 Retry-After（秒），没有时返回None"""
+    if response is not None:
+        for header in ("x-ogw-ratelimit-reset", "Retry-After"):
+            try:
+                return max(0.0, float(response.headers[header]))
+            except (KeyError, ValueError):
+                continue
+    return None
+
+def _retry_delay(response, attempt):
+    """
+    计算重试前的等待时间
+
+    优先使用飞书返回的限频重置时间，否则指数退避并加随机抖动。
+    """
+    retry_after = _retry_after(response)
+    if retry_after is not None:
+        return retry_after
+    return min(30.0, 2 ** attempt) + random.uniform(0, 0.5)
+
+def send_message(url, headers, receive_id, message_content, limiter=None, retries=None, timeout=None, uuid=None):
+    """
+    向单个接收者发送消息，触发限频（HTTP 429 或限频错误码）、服务端错误或网络异常时退避重试
+
+    Args:
+        url (str): 发送消息接口地址
+        headers (dict): 请求头（含 tenant_access_token）
+        receive_id (str): 接收者ID
+        message_content (dict): 消息内容
+        limiter (TokenBucket, optional): 请求速率限制器
+        retries (int, optional): 最大重试次数，默认为FEISHU_SEND_RETRIES
+        timeout (float, optional): 单次请求的超时时间（秒）
+        uuid (str, optional): 请求去重标识，飞书对相同 uuid 的消息在一小时内只发送一次
+
+    Returns:
+        dict: ok（是否成功）、error（失败原因）、attempts（请求次数）、
+            retryable（失败是否可重试）、retry_after（飞书要求的重试等待秒数，没有时为None）
+    """
+    retries = FEISHU_SEND_RETRIES if retries is None else retries
     payload = {
-        "app_id": app_id,
-        "app_secret": app_secret
+        "receive_id": receive_id,
+        "msg_type": "interactive",
+        "content": json.dumps(message_content, ensure_ascii=False)
     }
-    
-    headers = {
-        "Content-Type": "application/json; charset=utf-8"
-    }
-    
-    try:
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        if response.status_code == 200:
+    if uuid:
+        payload["uuid"] = uuid
+    error = None
+    retryable = True
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(_retry_delay(response, attempt))
+        if limiter:
+            limiter.acquire()
+        response = None
+        try:
+            response = get_session().post(url, json=payload, headers=headers, timeout=timeout)
+        except Exception as e:
+            error = f"请求异常: {e}"
+            retryable = True
+            continue
+
+        try:
             result = response.json()
-            if result.get("code") == 0:
-                _tenant_access_token = result.get("tenant_access_token")
-                # 设置过期时间 (2小时 - 10分钟缓冲)
-                _token_expires_at = current_time + 6600
-                return _tenant_access_token
-            else:
-                print(f"获取tenant_access_token失败: {result}")
-                return None
-        else:
-            print(f"获取tenant_access_token失败: HTTP {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"获取tenant_access_token异常: {e}")
-        return None
+        except ValueError:
+            result = {}
+        code = result.get("code")
+        if response.status_code == 200 and code == 0:
+            return {"ok": True, "error": None, "attempts": attempt + 1}
+        error = f"HTTP {response.status_code}: {result or response.text}"
+        retryable = response.status_code == 429 or response.status_code >= 500 or code in FEISHU_RATE_LIMIT_CODES
+        if not retryable:
+            # 参数错误、无权限等不可重试的错误
+            break
+    return {"ok": False, "error": error, "attempts": attempt + 1,
+            "retryable": retryable, "retry_after": _retry_after(response)}
 
-def send_message_to_receivers(receive_ids, message_content, receive_id_type="open_id"):
+def send_message_to_receivers(receive_ids, message_content, receive_id_type="open_id", max_workers=None, qps=None,
+                              retries=None, timeout=None, uuids=None):
     """
-    向指定的receive_id列表发送消息
+    向指定的receive_id列表并发发送消息
+    
+    所有请求共享同一个令牌桶，整体速率不超过应用级限频。
     
     Args:
         receive_ids (list): 接收者ID列表
         message_content (dict): 消息内容
         receive_id_type (str): 接收者ID类型 (open_id, union_id, user_id, email, chat_id)
+        max_workers (int, optional): 最大并发数，默认为FEISHU_SEND_WORKERS
+        qps (float, optional): 每秒最大请求数，默认为FEISHU_SEND_QPS，小于等于0时不限速
+        retries (int, optional): 每个接收者的最大重试次数，默认为FEISHU_SEND_RETRIES
+        timeout (float, optional): 单次请求的超时时间（秒）
+        uuids (dict, optional): 接收者ID -> 请求去重标识
+    
+    Returns:
+        dict: 接收者ID -> 发送结果（见 send_message），获取令牌失败时返回空字典
     """
     tenant_access_token = get_tenant_access_token()
     if not tenant_access_token:
-        return False
+        return {}
     
     url = f"https://open.feishu.cn/open-apis/im/v1/messages?receive_id_type={receive_id_type}"
     
@@ -102,36 +165,27 @@ def send_message_to_receivers(receive_ids, message_content, receive_id_type="ope
         "Authorization": f"Bearer {tenant_access_token}",
         "Content-Type": "application/json; charset=utf-8"
     }
+
+    # 去重并保持原有顺序
+    receive_ids = list(dict.fromkeys(receive_ids))
+    max_workers = max_workers or FEISHU_SEND_WORKERS
+    qps = FEISHU_SEND_QPS if qps is None else qps
+    limiter = TokenBucket(qps, capacity=max_workers) if qps > 0 else None
+    uuids = uuids or {}
     
-    success_count = 0
-    failed_count = 0
-    
-    for receive_id in receive_ids:
-        try:
-            payload = {
-                "receive_id": receive_id,
-                "msg_type": "interactive",
-                "content": json.dumps(message_content, ensure_ascii=False)
-            }
-            
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            if response.status_code == 200:
-                result = response.json()
-                if result.get("code") == 0:
-                    success_count += 1
-                else:
-                    print(f"向 {receive_id} 发送消息失败: {result}")
-                    failed_count += 1
-            else:
-                print(f"向 {receive_id} 发送消息失败: HTTP {response.status_code}")
-                print(f"Response content: {response.text}")
-                failed_count += 1
-        except Exception as e:
-            print(f"向 {receive_id} 发送消息异常: {e}")
-            failed_count += 1
-    
-    print(f"飞书消息推送完成: 成功 {success_count} 个, 失败 {failed_count} 个")
-    return success_count > 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            receive_id: executor.submit(send_message, url, headers, receive_id, message_content, limiter,
+                                        retries, timeout, uuids.get(receive_id))
+            for receive_id in receive_ids
+        }
+        results = {receive_id: future.result() for receive_id, future in futures.items()}
+
+    failed = {receive_id: result for receive_id, result in results.items() if not result["ok"]}
+    for receive_id, result in failed.items():
+        print(f"向 {receive_id} 发送消息失败: {result['error']}")
+    print(f"飞书消息推送完成: 成功 {len(results) - len(failed)} 个, 失败 {len(failed)} 个")
+    return results
 
 def create_interactive_message(html_content, current_date=None):
     """
@@ -183,13 +237,19 @@ def create_interactive_message(html_content, current_date=None):
         ]
     }
 
-def publish_to_feishu_webhook(html_content, current_date=None):
+def publish_to_feishu_webhook(html_content, current_date=None, timeout=None):
     """
     通过Webhook将GitHub Trending日报推送到飞书机器人
     
     Args:
         html_content (str): HTML内容
         current_date (datetime, optional): 统一日期，默认为当前时间
+        timeout (float, optional): 请求超时时间（秒）
+    
+    Returns:
+        dict: ok（是否成功）、error（失败原因）、retryable（失败是否可重试）
+
+    Webhook没有幂等键：2xx但响应体无法解析时视为成功，只有确定请求未被处理时才标记为可重试。
     """
     if current_date is None:
         current_date = datetime.now()
@@ -198,7 +258,7 @@ def publish_to_feishu_webhook(html_content, current_date=None):
         webhook_url = os.environ.get("FEISHU_WEBHOOK_URL")
         if not webhook_url:
             print("未配置飞书Webhook URL")
-            return
+            return {"ok": False, "error": "未配置飞书Webhook URL"}
             
         # 构造飞书消息体
         payload = {
@@ -241,32 +301,67 @@ def publish_to_feishu_webhook(html_content, current_date=None):
         }
         
         # 发送请求
-        response = requests.post(
+        response = get_session().post(
             webhook_url,
             headers={"Content-Type": "application/json"},
             data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
-            timeout=30
+            timeout=timeout
         )
         
-        if response.status_code == 200:
-            result = response.json()
-            if result.get("code") == 0:
-                print("飞书Webhook推送成功")
-            else:
-                print(f"飞书Webhook推送失败: {result}")
-        else:
-            print(f"飞书Webhook推送失败: HTTP {response.status_code}")
-            
     except Exception as e:
         print(f"飞书Webhook推送异常: {e}")
+        return {"ok": False, "error": str(e), "retryable": request_not_sent(e)}
+
+    if 200 <= response.status_code < 300:
+        try:
+            result = response.json()
+        except ValueError:
+            result = {"code": 0}
+        if result.get("code", 0) == 0:
+            print("飞书Webhook推送成功")
+            return {"ok": True, "error": None}
+        print(f"飞书Webhook推送失败: {result}")
+        return {"ok": False, "error": str(result), "retryable": False}
+    print(f"飞书Webhook推送失败: HTTP {response.status_code}")
+    return {"ok": False, "error": f"HTTP {response.status_code}",
+            "retryable": response.status_code in RETRYABLE_STATUS_CODES}
+
+def get_receive_ids():
+    """
+    解析 FEISHU_RECEIVE_IDS 环境变量（JSON数组）
+    
+    Returns:
+        list: 接收者ID列表，未配置或格式错误时返回空列表
+    """
+    receive_ids_str = os.environ.get("FEISHU_RECEIVE_IDS")
+    if not receive_ids_str:
+        print("未配置飞书接收者ID列表")
+        return []
+    try:
+        receive_ids = json.loads(receive_ids_str)
+    except json.JSONDecodeError:
+        receive_ids = None
+    if not isinstance(receive_ids, list):
+        print("飞书接收者ID列表格式错误，应为JSON数组")
+        return []
+    if not receive_ids:
+        print("飞书接收者ID列表为空")
+    return receive_ids
 
-def publish_to_feishu_app(html_content, current_date=None):
+def publish_to_feishu_app(html_content, current_date=None, receive_ids=None, retries=None, timeout=None, uuids=None):
     """
     通过App ID和App Secret将GitHub Trending日报推送到指定的receive_id列表
     
     Args:
         html_content (str): HTML内容
         current_date (datetime, optional): 统一日期，默认为当前时间
+        receive_ids (list, optional): 接收者ID列表，默认读取 FEISHU_RECEIVE_IDS
+        retries (int, optional): 每个接收者的最大重试次数，默认为FEISHU_SEND_RETRIES
+        timeout (float, optional): 单次请求的超时时间（秒）
+        uuids (dict, optional): 接收者ID -> 请求去重标识
+    
+    Returns:
+        dict: 接收者ID -> 发送结果（见 send_message）
     """
     if current_date is None:
         current_date = datetime.now()
@@ -278,55 +373,20 @@ def publish_to_feishu_app(html_content, current_date=None):
         
         if not app_id or not app_secret:
             print("未配置飞书App ID或App Secret，跳过App推送")
-            return
+            return {}
             
         # 获取接收者ID列表
-        receive_ids_str = os.environ.get("FEISHU_RECEIVE_IDS")
-        if not receive_ids_str:
-            print("未配置飞书接收者ID列表")
-            return
-            
-        # 解析接收者ID列表
-        try:
-            receive_ids = json.loads(receive_ids_str)
-            if not isinstance(receive_ids, list):
-                print("飞书接收者ID列表格式错误，应为JSON数组")
-                return
-        except json.JSONDecodeError:
-            print("飞书接收者ID列表格式错误，应为JSON数组")
-            return
-            
+        if receive_ids is None:
+            receive_ids = get_receive_ids()
         if not receive_ids:
-            print("飞书接收者ID列表为空")
-            return
+            return {}
             
         # 创建消息内容
         message_content = create_interactive_message(html_content, current_date)
         
         # 发送消息
-        send_message_to_receivers(receive_ids, message_content)
+        return send_message_to_receivers(receive_ids, message_content, retries=retries, timeout=timeout, uuids=uuids)
         
     except Exception as e:
         print(f"飞书App推送异常: {e}")
-
-def publish_to_feishu(html_content, current_date=None):
-    """
-    将GitHub Trending日报推送到飞书
-    
-    Args:
-        html_content (str): HTML内容
-        current_date (datetime, optional): 统一日期，默认为当前时间
-    """
-    if current_date is None:
-        current_date = datetime.now()
-
-    # 优先使用Webhook推送
-    webhook_url = os.environ.get("FEISHU_WEBHOOK_URL")
-    if webhook_url:
-        publish_to_feishu_webhook(html_content, current_date)
-    
-    # 如果配置了App ID和App Secret，则也使用App推送
-    app_id = os.environ.get("FEISHU_APP_ID")
-    app_secret = os.environ.get("FEISHU_APP_SECRET")
-    if app_id and app_secret:
-        publish_to_feishu_app(html_content, current_date)
+        return {}
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from http_client import get_session
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 等平台没有 fcntl，退化为只在进程内加锁
+    fcntl = None
+
+# tenant_access_token 的进程外缓存文件，同一台机器上的多个进程共享
+FEISHU_TOKEN_CACHE_FILE = os.environ.get("FEISHU_TOKEN_CACHE_FILE", "data/feishu_token.json")
+# 距过期不足该秒数时提前刷新
+FEISHU_TOKEN_REFRESH_AHEAD = int(os.environ.get("FEISHU_TOKEN_REFRESH_AHEAD", "300"))
+
+TOKEN_URL = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal/"
+
+class TenantTokenProvider:
+    """
+    飞书 tenant_access_token 提供者
+
+    令牌及飞书返回的真实过期时间按 App ID 保存在缓存文件中。刷新时持有文件锁，
+    并发启动的多个进程中只有一个会请求鉴权接口，其余进程等待后直接读取新令牌。
+    """
+
+    def __init__(self, app_id, app_secret, path=None, refresh_ahead=None):
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.path = path or FEISHU_TOKEN_CACHE_FILE
+        self.refresh_ahead = FEISHU_TOKEN_REFRESH_AHEAD if refresh_ahead is None else refresh_ahead
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def _is_valid(self, expires_at):
+        return expires_at - self.refresh_ahead > time.time()
+
+    def _read_store(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_store(self, store):
+        # 令牌属于凭据，缓存文件仅当前用户可读写
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix='.token-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(store, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _fetch(self):
+        """
+        请求鉴权接口获取新令牌
+
+        Returns:
+            tuple: (令牌, 过期时间戳)，失败时返回 (None, 0)
+        """
+        payload = {
+            "app_id": self.app_id,
+            "app_secret": self.app_secret
+        }
+        headers = {
+            "Content-Type": "application/json; charset=utf-8"
+        }
+        try:
+            requested_at = time.time()
+            response = get_session().post(TOKEN_URL, json=payload, headers=headers)
+            if response.status_code != 200:
+                print(f"获取tenant_access_token失败: HTTP {response.status_code}")
+                return None, 0
+            result = response.json()
+            if result.get("code") != 0:
+                print(f"获取tenant_access_token失败: {result}")
+                return None, 0
+            # expire 为剩余有效秒数，以发出请求的时间为起点计算，避免高估有效期
+            return result.get("tenant_access_token"), requested_at + int(result.get("expire", 0))
+        except Exception as e:
+            print(f"获取tenant_access_token异常: {e}")
+            return None, 0
+
+    def get_token(self):
+        """
+        获取有效的 tenant_access_token
+
+        依次查找进程内缓存和缓存文件，都已过期（或即将过期）时才请求鉴权接口。
+
+        Returns:
+            str: 令牌，获取失败时返回None
+        """
+        if self._token and self._is_valid(self._expires_at):
+            return self._token
+
+        with self._lock:
+            if self._token and self._is_valid(self._expires_at):
+                return self._token
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(f"{self.path}.lock", 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    store = self._read_store()
+                    entry = store.get(self.app_id) or {}
+                    if entry.get("token") and self._is_valid(entry.get("expires_at", 0)):
+                        self._token, self._expires_at = entry["token"], entry["expires_at"]
+                        return self._token
+
+                    token, expires_at = self._fetch()
+                    if not token:
+                        return None
+                    store[self.app_id] = {"token": token, "expires_at": expires_at}
+                    try:
+                        self._write_store(store)
+                    except OSError as e:
+                        print(f"保存tenant_access_token缓存失败: {e}")
+                    self._token, self._expires_at = token, expires_at
+                    return token
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+def get_token_provider(app_id, app_secret):
+    """
+    获取进程内共享的令牌提供者（每个 App ID 一个）
+
+    Returns:
+        TenantTokenProvider: 令牌提供者
+    """
+    with _providers_lock:
+        provider = _providers.get(app_id)
+        if provider is None or provider.app_secret != app_secret:
+            provider = _providers[app_id] = TenantTokenProvider(app_id, app_secret)
+        return provider
@@ -1,68 +1,262 @@
-import requests
-from bs4 import BeautifulSoup
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from http_client import get_session
+from project import Project, parse_star_count
+from response_cache import (get_cached_response, is_response_fresh, conditional_headers,
+                            store_response, touch_response, save_response_cache)
+
+# 需要抓取的时间范围
+TRENDING_RANGES = ('daily', 'weekly', 'monthly')
+# 并发抓取的最大线程数（可通过环境变量覆盖）
+FETCH_MAX_WORKERS = int(os.environ.get("TRENDING_FETCH_WORKERS", "6"))
+# 页面解析后端：'fast'（仅解析项目行）或 'bs4'（完整文档树）
+PARSER_BACKEND = os.environ.get("TRENDING_PARSER", "fast")
+
+# 响应缓存中解析结果的格式版本，格式变化时旧条目不再复用
+PAYLOAD_FORMAT = 2
+
+# 快速解析路径只保留项目行和分页栏
+_FAST_STRAINER = SoupStrainer(class_=['Box-row', 'pagination'])
+try:
+    import lxml  # noqa: F401
+    _FAST_PARSER = 'lxml'
+except ImportError:
+    _FAST_PARSER = 'html.parser'
+
+def parse_trending_page(html, since='daily', backend=None):
+    """
+    解析单个GitHub Trending页面
+
+    Args:
+        html (str): 页面HTML内容
+        since (str): 页面对应的时间范围 ('daily', 'weekly', 'monthly')
+        backend (str, optional): 解析后端，'fast'（仅解析项目行，默认）或 'bs4'（完整文档树）
+
+    Returns:
+        tuple: (Project列表, 最后一页页码)，没有下一页时页码为None；项目排名为页内序号
+    """
+    if (backend or PARSER_BACKEND) == 'bs4':
+        return _parse_full_tree(html, since)
+    return _parse_fast(html, since)
+
+def _parse_full_tree(html, since):
+    """使用html.parser构建完整文档树并通过CSS选择器提取项目信息"""
+    soup = BeautifulSoup(html, 'html.parser')
+    projects = []
+
+    for art in soup.select('article.Box-row'):
+        title_a = art.select_one('h2 a')
+        name = title_a.get_text(strip=True).replace(' ','').replace('\n','')
+        desc = art.select_one('p').get_text(strip=True) if art.select_one('p') else ""
+
+        # 获取编程语言
+        language_elem = art.select_one('span[itemprop="programmingLanguage"]')
+        language = language_elem.get_text(strip=True) if language_elem else ""
+
+        stats = art.select('a.Link--muted')
+        total_stars = stats[0].get_text(strip=True) if len(stats) > 0 else "0"
+        added_stars = art.select_one('span.d-inline-block.float-sm-right')
+        added_stars = added_stars.get_text(strip=True) if added_stars else "0 stars"
+
+        projects.append(Project.from_name(
+            name,
+            desc=desc,
+            language=language,
+            total_stars=parse_star_count(total_stars),
+            added_stars=parse_star_count(added_stars),
+            period=since,
+            rank=len(projects) + 1
+        ))
+
+    return projects, _parse_last_page(soup)
+
+def _is_added_stars(tag):
+    """匹配新增星标元素 span.d-inline-block.float-sm-right"""
+    classes = tag.get('class') or ()
+    return tag.name == 'span' and 'd-inline-block' in classes and 'float-sm-right' in classes
+
+def _slice_rows(html):
+    """
+    截取从第一个项目行到分页栏（或最后一个项目行）结束的HTML片段
+
+    页面头部的脚本、导航和页脚不参与解析；找不到项目行时返回原始HTML。
+    """
+    start = html.find('<article')
+    if start < 0:
+        return html
+    end = html.rfind('</article>')
+    if end < start:
+        return html
+    end += len('</article>')
+
+    pagination = html.find('class="pagination"', end)
+    if pagination >= 0:
+        close = html.find('</div>', pagination)
+        if close >= 0:
+            end = close + len('</div>')
+    return html[start:end]
+
+def _parse_fast(html, since):
+    """
+    只解析项目行和分页栏的快速解析路径
+
+    先按文本定位截取项目行所在的片段，再通过SoupStrainer跳过片段中的其余元素；
+    优先使用lxml解析器（未安装时回退到html.parser），并用find代替CSS选择器。
+    返回结果与完整文档树解析完全一致。
+    """
+    soup = BeautifulSoup(_slice_rows(html), _FAST_PARSER, parse_only=_FAST_STRAINER)
+    projects = []
+
+    for art in soup.find_all('article', class_='Box-row'):
+        title_a = art.find('h2').find('a')
+        name = title_a.get_text(strip=True).replace(' ','').replace('\n','')
+        desc_elem = art.find('p')
+        desc = desc_elem.get_text(strip=True) if desc_elem else ""
+
+        # 获取编程语言
+        language_elem = art.find('span', itemprop='programmingLanguage')
+        language = language_elem.get_text(strip=True) if language_elem else ""
+
+        stars_elem = art.find('a', class_='Link--muted')
+        total_stars = stars_elem.get_text(strip=True) if stars_elem else "0"
+        added_stars = art.find(_is_added_stars)
+        added_stars = added_stars.get_text(strip=True) if added_stars else "0 stars"
+
+        projects.append(Project.from_name(
+            name,
+            desc=desc,
+            language=language,
+            total_stars=parse_star_count(total_stars),
+            added_stars=parse_star_count(added_stars),
+            period=since,
+            rank=len(projects) + 1
+        ))
+
+    return projects, _parse_last_page(soup)
+
+def _parse_last_page(soup):
+    """
+    从分页栏中解析最后一页的页码
+
+    Returns:
+        int: 最后一页页码；没有下一页时返回None，有下一页但无法确定总页数时返回0
+    """
+    if not soup.select_one('a.next_page'):
+        return None
+    numbers = [int(a.get_text(strip=True)) for a in soup.select('.pagination a')
+               if re.fullmatch(r'\d+', a.get_text(strip=True))]
+    return max(numbers) if numbers else 0
+
+def fetch_trending_page(since, page):
+    """
+    抓取并解析指定时间范围的单个页面
+
+    新鲜期内直接复用缓存的解析结果；否则发送条件请求，服务器返回304时复用缓存。
+
+    Args:
+        since (str): 时间范围 ('daily', 'weekly', 'monthly')
+        page (int): 页码
+
+    Returns:
+        tuple: (Project列表, 最后一页页码)
+    """
+    url = f"https://github.com/trending?since={since}&page={page}"
+    entry = get_cached_response(url)
+    if entry and entry['payload'].get('format') != PAYLOAD_FORMAT:
+        entry = None
+    if entry and is_response_fresh(entry):
+        return _from_payload(entry['payload'])
+
+    headers = {"User-Agent":"Mozilla/5.0"}
+    headers.update(conditional_headers(entry))
+    res = get_session().get(url, headers=headers)
+    if res.status_code == 304 and entry:
+        touch_response(url)
+        return _from_payload(entry['payload'])
+    res.raise_for_status()
+
+    projects, last_page = parse_trending_page(res.text, since)
+    store_response(url, res.headers.get('ETag'), res.headers.get('Last-Modified'),
+                   {'format': PAYLOAD_FORMAT, 'projects': [p.to_record() for p in projects],
+                    'last_page': last_page})
+    return projects, last_page
+
+def _from_payload(payload):
+    """从响应缓存的解析结果还原Project列表"""
+    return [Project.from_record(r) for r in payload['projects']], payload['last_page']
 
 def fetch_trending(since):
     """
     从GitHub Trending页面抓取数据（支持翻页）
-    
+
     Args:
         since (str): 时间范围 ('daily', 'weekly', 'monthly')
-    
+
     Returns:
-        list: 包含项目信息的字典列表
+        list: Project列表
     """
-    projects = []
-    page = 1
-    
-    while True:
-        url = f"https://github.com/trending?since={since}&page={page}"
-        try:
-            res = requests.get(url, headers={"User-Agent":"Mozilla/5.0"}, timeout=30)
-            res.raise_for_status()
-            soup = BeautifulSoup(res.text, 'html.parser')
-            
-            # 检查是否有项目数据
-            articles = soup.select('article.Box-row')
-            if not articles:
-                break
-                
-            for art in articles:
-                title_a = art.select_one('h2 a')
-                name = title_a.get_text(strip=True).replace(' ','').replace('\n','')
-                link = "https://github.com" + title_a['href']
-                desc = art.select_one('p').get_text(strip=True) if art.select_one('p') else ""
-                
-                # 获取用户名（从链接中提取）
-                user_name = name.split('/')[0] if '/' in name else ""
-                
-                # 获取编程语言
-                language_elem = art.select_one('span[itemprop="programmingLanguage"]')
-                language = language_elem.get_text(strip=True) if language_elem else ""
-                
-                stats = art.select('a.Link--muted')
-                total_stars = stats[0].get_text(strip=True) if len(stats) > 0 else "0"
-                added_stars = art.select_one('span.d-inline-block.float-sm-right')
-                added_stars = added_stars.get_text(strip=True) if added_stars else "0 stars"
-                
-                projects.append({
-                    "name": name, 
-                    "link": link, 
-                    "desc": desc, 
-                    "user_name": user_name,
-                    "language": language,
-                    "total_stars": total_stars,
-                    "added_stars": added_stars
-                })
-            
-            # 检查是否还有下一页
-            next_button = soup.select_one('a.next_page')
-            if not next_button:
+    return fetch_all_trending((since,), max_workers=1)[since]
+
+def fetch_all_trending(ranges=TRENDING_RANGES, max_workers=None):
+    """
+    并发抓取多个时间范围及其所有分页的GitHub Trending数据
+
+    先并发请求各时间范围的第一页，再根据分页栏一次性并发请求剩余页面；
+    分页栏无法给出总页数时，逐批继续请求下一页。
+
+    Args:
+        ranges (tuple): 时间范围列表，默认为日榜、周榜、月榜
+        max_workers (int, optional): 最大并发线程数，默认为FETCH_MAX_WORKERS
+
+    Returns:
+        dict: 时间范围 -> Project列表（按页码顺序拼接，排名为全榜序号）
+    """
+    # 每个时间范围: 页码 -> 项目列表；抓取失败的页码之后的数据将被丢弃
+    pages = {since: {} for since in ranges}
+    failed_page = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers or FETCH_MAX_WORKERS) as executor:
+        scheduled = {since: {1} for since in ranges}
+        pending = [(since, 1) for since in ranges]
+        while pending:
+            futures = {job: executor.submit(fetch_trending_page, *job) for job in pending}
+            pending = []
+            for (since, page), future in futures.items():
+                try:
+                    projects, last_page = future.result()
+                except Exception as e:
+                    print(f"抓取失败: {e}")
+                    failed_page[since] = min(page, failed_page.get(since, page))
+                    continue
+
+                # 空页面说明已经没有更多数据
+                if not projects:
+                    failed_page[since] = min(page, failed_page.get(since, page))
+                    continue
+
+                pages[since][page] = projects
+                if last_page is None:
+                    continue
+                # 已知总页数时一次性调度全部剩余页面，否则继续请求下一页
+                for n in range(page + 1, max(last_page, page + 1) + 1):
+                    if n not in scheduled[since]:
+                        scheduled[since].add(n)
+                        pending.append((since, n))
+
+    save_response_cache()
+
+    result = {}
+    for since in ranges:
+        projects = []
+        for page in sorted(pages[since]):
+            if page >= failed_page.get(since, float('inf')):
                 break
-                
-            page += 1
-            
-        except Exception as e:
-            print(f"抓取失败: {e}")
-            break
-    
-    return projects
\ No newline at end of file
+            projects.extend(pages[since][page])
+        for rank, project in enumerate(projects, 1):
+            project.rank = rank
+        result[since] = projects
+    return result
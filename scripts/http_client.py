@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# 默认连接池与超时配置
+DEFAULT_HOST_CONFIG = {
+    "pool_connections": 4,
+    "pool_maxsize": 10,
+    "timeout": 30
+}
+
+# 按主机配置连接池大小和超时时间，可通过环境变量 HTTP_HOST_CONFIG（JSON对象）覆盖或补充
+HOST_CONFIG = {
+    "github.com": {"pool_maxsize": 10, "timeout": 30},
+    "open.feishu.cn": {"pool_maxsize": 20, "timeout": 30}
+}
+
+# 服务端明确表示未处理请求、可以安全重试的状态码
+RETRYABLE_STATUS_CODES = {429, 503}
+
+_session = None
+_session_lock = threading.Lock()
+
+def _load_host_config():
+    """合并内置配置与环境变量中的主机配置"""
+    config = {host: dict(options) for host, options in HOST_CONFIG.items()}
+    raw = os.environ.get("HTTP_HOST_CONFIG")
+    if raw:
+        try:
+            for host, options in json.loads(raw).items():
+                config.setdefault(host, {}).update(options)
+        except (json.JSONDecodeError, AttributeError):
+            print("HTTP_HOST_CONFIG格式错误，应为JSON对象，已忽略")
+    return config
+
+class PooledSession(requests.Session):
+    """
+    按主机复用keep-alive连接的Session
+
+    每个已配置的主机挂载独立的连接池，未显式传入timeout的请求使用该主机的默认超时。
+    """
+
+    def __init__(self, host_config=None):
+        super().__init__()
+        self.host_config = host_config if host_config is not None else _load_host_config()
+
+        self.mount("https://", self._make_adapter(DEFAULT_HOST_CONFIG))
+        self.mount("http://", self._make_adapter(DEFAULT_HOST_CONFIG))
+        for host, options in self.host_config.items():
+            adapter = self._make_adapter(options)
+            self.mount(f"https://{host}/", adapter)
+            self.mount(f"http://{host}/", adapter)
+
+    @staticmethod
+    def _make_adapter(options):
+        return HTTPAdapter(
+            pool_connections=options.get("pool_connections", DEFAULT_HOST_CONFIG["pool_connections"]),
+            pool_maxsize=options.get("pool_maxsize", DEFAULT_HOST_CONFIG["pool_maxsize"])
+        )
+
+    def timeout_for(self, url):
+        """获取URL对应主机的默认超时时间"""
+        host = urlsplit(url).hostname or ""
+        options = self.host_config.get(host, {})
+        return options.get("timeout", DEFAULT_HOST_CONFIG["timeout"])
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout_for(url)
+        return super().request(method, url, **kwargs)
+
+def request_not_sent(exc):
+    """
+    判断请求异常是否发生在建立连接阶段
+
+    此时请求一定没有到达服务端，对没有幂等键的接口重试也不会重复投递；
+    读取超时、连接中断等情况下服务端可能已经处理，不应自动重试。
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError) and exc.args:
+        return isinstance(getattr(exc.args[0], 'reason', None), NewConnectionError)
+    return False
+
+def get_session():
+    """
+    获取进程内共享的HTTP会话（抓取器和各推送渠道共用）
+
+    Returns:
+        PooledSession: 共享会话
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PooledSession()
+    return _session
+
+def close_session():
+    """关闭共享会话并释放连接池"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
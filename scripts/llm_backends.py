@@ -0,0 +1,113 @@
+import os
+import threading
+
+from http_client import get_session
+
+# LLM后端：'dashscope'（默认）或 'openai'（OpenAI兼容接口，含本地替身服务）
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "dashscope")
+# 摘要使用的模型
+SUMMARY_MODEL = os.environ.get("SUMMARY_MODEL", "qwen-max")
+
+class LLMBackend:
+    """
+    LLM后端接口
+
+    子类实现 complete，返回模型输出文本，调用失败时返回None。
+    """
+
+    name = ""
+
+    def __init__(self, model):
+        self.model = model
+
+    @property
+    def cache_id(self):
+        """参与摘要缓存键计算的后端标识，不同后端或模型的摘要互不复用"""
+        return self.model
+
+    def complete(self, prompt):
+        raise NotImplementedError
+
+class DashScopeBackend(LLMBackend):
+    """阿里云DashScope（通义千问）后端"""
+
+    name = "dashscope"
+
+    def __init__(self, model=None, api_key=None):
+        super().__init__(model or SUMMARY_MODEL)
+        self.api_key = api_key or os.environ.get("DASHSCOPE_API_KEY")
+
+    def complete(self, prompt):
+        from dashscope import Generation
+
+        try:
+            resp = Generation.call(model=self.model, prompt=prompt, api_key=self.api_key,
+                                   result_format='message')
+            if resp.status_code == 200:
+                return resp.output.choices[0].message.content
+            print(f"LLM调用失败: HTTP {resp.status_code}")
+        except Exception as e:
+            print(f"LLM调用失败: {e}")
+        return None
+
+class OpenAICompatibleBackend(LLMBackend):
+    """OpenAI兼容的 /chat/completions 接口后端（使用共享HTTP会话）"""
+
+    name = "openai"
+
+    def __init__(self, base_url=None, model=None, api_key=None):
+        super().__init__(model or SUMMARY_MODEL)
+        self.base_url = (base_url or os.environ.get("LLM_BASE_URL", "http://127.0.0.1:8000/v1")).rstrip('/')
+        self.api_key = api_key or os.environ.get("LLM_API_KEY")
+
+    @property
+    def cache_id(self):
+        return f"{self.name}:{self.model}"
+
+    def complete(self, prompt):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        try:
+            response = get_session().post(f"{self.base_url}/chat/completions", json=payload, headers=headers)
+            if response.status_code == 200:
+                return response.json()["choices"][0]["message"]["content"]
+            print(f"LLM调用失败: HTTP {response.status_code}")
+        except Exception as e:
+            print(f"LLM调用失败: {e}")
+        return None
+
+# 已注册的后端
+BACKENDS = {
+    DashScopeBackend.name: DashScopeBackend,
+    OpenAICompatibleBackend.name: OpenAICompatibleBackend
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """
+    获取进程内共享的LLM后端（由 LLM_BACKEND 决定）
+
+    Returns:
+        LLMBackend: LLM后端
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_cls = BACKENDS.get(LLM_BACKEND)
+                if backend_cls is None:
+                    raise ValueError(f"未知的LLM后端: {LLM_BACKEND}，可选: {', '.join(BACKENDS)}")
+                _backend = backend_cls()
+    return _backend
+
+def set_backend(backend):
+    """替换进程内共享的LLM后端（用于压测或自定义后端）"""
+    global _backend
+    _backend = backend
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+本地LLM替身服务
+
+提供OpenAI兼容的 /v1/chat/completions 接口，根据提示词返回确定性的摘要，
+可配置响应延迟和错误率，用于在无网络、无API密钥的环境中压测摘要流程的
+并发、限速和缓存行为。
+
+用法:
+    python scripts/llm_stub_server.py --port 8000 --latency 1.0 --jitter 0.5 --error-rate 0.1
+    LLM_BACKEND=openai LLM_BASE_URL=http://127.0.0.1:8000/v1 python scripts/main.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 批量提示词中的项目行：- 'owner/repo'：描述
+BATCH_ITEM_PATTERN = re.compile(r"^- '([^']+)'：", re.M)
+# 单项目提示词中的项目名
+SINGLE_ITEM_PATTERN = re.compile(r"GitHub项目 '([^']+)'")
+
+def stub_summary(name):
+    """根据项目名生成确定性的摘要小节"""
+    digest = hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]
+    return {
+        'background': f"{name} 解决了替身场景中的示例痛点（{digest}）。",
+        'intro': f"{name} 是本地替身服务生成的示例项目。其摘要内容仅用于压测。",
+        'features': f"**确定性输出**；**可配置延迟**（{digest}）。"
+    }
+
+def stub_completion(prompt):
+    """根据提示词生成确定性的回复内容（支持单项目和批量提示词）"""
+    names = BATCH_ITEM_PATTERN.findall(prompt)
+    if names:
+        return json.dumps({name: stub_summary(name) for name in names}, ensure_ascii=False)
+
+    match = SINGLE_ITEM_PATTERN.search(prompt)
+    sections = stub_summary(match.group(1) if match else prompt[:32])
+    return (f"【项目背景】{sections['background']}\n"
+            f"【核心介绍】{sections['intro']}\n"
+            f"【关键特性】{sections['features']}")
+
+class StubHandler(BaseHTTPRequestHandler):
+    """处理 /v1/chat/completions 请求"""
+
+    server_version = "LLMStub/1.0"
+
+    def do_POST(self):
+        config = self.server.config
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+            prompt = body['messages'][-1]['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            self._send(400, {"error": {"message": "invalid request"}})
+            return
+
+        with self.server.rng_lock:
+            delay = max(0.0, config.latency + self.server.rng.uniform(-config.jitter, config.jitter))
+            failed = self.server.rng.random() < config.error_rate
+            status = self.server.rng.choice((429, 500, 503))
+        time.sleep(delay)
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+            self.server.stats['errors'] += int(failed)
+
+        if failed:
+            self._send(status, {"error": {"message": "stub injected error"}})
+            return
+        self._send(200, {
+            "id": "stub-" + hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12],
+            "object": "chat.completion",
+            "model": body.get('model', 'stub'),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": stub_completion(prompt)},
+                "finish_reason": "stop"
+            }]
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.server.config.quiet:
+            super().log_message(format, *args)
+
+def make_server(host='127.0.0.1', port=8000, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, quiet=True):
+    """
+    创建替身服务（调用方负责 serve_forever / shutdown）
+
+    Returns:
+        ThreadingHTTPServer: 服务实例，stats 属性记录请求数和注入的错误数
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency=latency, jitter=jitter, error_rate=error_rate, quiet=quiet)
+    server.rng = random.Random(seed)
+    server.rng_lock = threading.Lock()
+    server.stats = {'requests': 0, 'errors': 0}
+    server.stats_lock = threading.Lock()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="本地LLM替身服务（OpenAI兼容接口）")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.5, help="平均响应延迟（秒）")
+    parser.add_argument('--jitter', type=float, default=0.0, help="延迟的随机浮动范围（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="注入错误（429/500/503）的比例")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子，相同种子下延迟和错误序列可复现")
+    parser.add_argument('--verbose', action='store_true', help="输出每个请求的访问日志")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                         args.seed, quiet=not args.verbose)
+    print(f"LLM替身服务已启动: http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"请求总数 {server.stats['requests']}，注入错误 {server.stats['errors']}")
+
+if __name__ == "__main__":
+    main()
@@ -13,38 +13,60 @@ CURRENT_DATE = datetime.now(ZoneInfo("Asia/Shanghai"))
 
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-from github_trending import fetch_trending
-from page_generator import build_refined_html, save_html_file, generate_pages_index
-from wechat_publisher import publish_to_wechat
-from feishu_publisher import publish_to_feishu
+from github_trending import fetch_all_trending
+from project_registry import ProjectRegistry
+from ai_processor import SummarizationStage
+from cache_manager import compact_cache, flush_cache
+from page_generator import iter_refined_html, save_html_file, generate_pages_index
+from static_output import STATIC_MINIFY, optimize_static_dir, print_static_stats
+from publishers import enabled_publishers, publish_all, render_contents, wait_publishers
+from publish_outbox import PublishOutbox
+from http_client import close_session
 
 def main():
     """主函数"""
     # 收集数据
     print("正在收集GitHub Trending数据...")
-    d, w, m = fetch_trending('daily'), fetch_trending('weekly'), fetch_trending('monthly')
+    trending = fetch_all_trending()
+    d, w, m = trending['daily'], trending['weekly'], trending['monthly']
     
     if d or w or m:
         print("数据收集完成，正在生成日报...")
-        # 构建HTML内容
-        final_html = build_refined_html(d, w, m, CURRENT_DATE)
-        
-        # 保存HTML文件用于GitHub Pages
-        filepath = save_html_file(final_html, CURRENT_DATE)
+        # 跨榜单去重，同一项目只生成一次摘要
+        registry = ProjectRegistry(d, w, m)
+        print(f"共 {len(d) + len(w) + len(m)} 个上榜项目，去重后 {len(registry)} 个")
+
+        # 渲染前并发生成全部摘要（过期摘要和失败重试在后台进行）
+        summarization = SummarizationStage()
+        registry.set_summaries(summarization.run(registry.unique_projects()))
+
+        # 逐块生成HTML并直接写入文件（用于GitHub Pages，引用共享样式表）
+        filepath = save_html_file(iter_refined_html(d, w, m, CURRENT_DATE, registry), CURRENT_DATE)
         print(f"日报已保存至: {filepath}")
+        # 只渲染已启用渠道需要的推送内容（正文片段已在注册表中缓存）
+        publishers = enabled_publishers()
+        contents = render_contents(publishers, d, w, m, CURRENT_DATE, registry)
         
         # 生成GitHub Pages索引页面
-        generate_pages_index()
+        generate_pages_index(os.path.basename(filepath))
         print("GitHub Pages索引页面生成完成")
+
+        # 压缩静态文件并生成预压缩文件（可选）
+        if STATIC_MINIFY:
+            print_static_stats(optimize_static_dir())
         
-        # 发送到微信公众号（如果需要）
-        print("正在推送至微信公众号...")
-        publish_to_wechat(final_html, CURRENT_DATE)
-        
-        # 发送到飞书机器人（如果需要）
-        print("正在推送至飞书机器人...")
-        publish_to_feishu(final_html, CURRENT_DATE)
+        # 并发推送到所有已配置的渠道（微信公众号、飞书等），已成功的投递不会重复发送
+        print("正在推送日报...")
+        publish_all(contents, CURRENT_DATE, publishers, outbox=PublishOutbox())
+
+        # 等待后台摘要刷新完成后写回缓存
+        summarization.wait()
+        flush_cache()
+        compact_cache()
         
+        # 超时的发布渠道仍可能在使用共享会话，等其结束后再关闭
+        wait_publishers()
+        close_session()
         print("所有任务完成！")
     else:
         print("未能获取到GitHub Trending数据")
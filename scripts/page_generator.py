@@ -1,297 +1,174 @@
+import functools
+import hashlib
 import os
 import re
 from datetime import datetime
 
-def build_refined_html(daily, weekly, monthly, current_date=None):
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from page_manifest import PageManifest
+from project_registry import ProjectRegistry
+
+# 页面模板目录
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# 样式表在输出目录中的子目录，文件名带内容指纹，可被浏览器和CDN永久缓存
+STYLESHEET_DIR = 'assets'
+
+# 月份片段和年度归档页依赖的模板，任何一个变化都会重新渲染全部归档
+ARCHIVE_TEMPLATES = ('_month_group.html', '_macros.html', 'archive.html', '_archive_layout.html')
+# 索引首页展示的最近日报数量
+ARCHIVE_RECENT_DAYS = int(os.environ.get("ARCHIVE_RECENT_DAYS", "14"))
+
+# 公众号图文中项目正文段落的内联样式（公众号会丢弃 class）
+WECHAT_PARAGRAPH_ATTRS = 'style="font-size:15px;line-height:1.75;color:#333;margin:0 0 15px;"'
+
+MONTH_NAMES = {f"{month:02d}": f"{month:02d}月" for month in range(1, 13)}
+
+# 模板编译后缓存在环境中，进程内每个模板只编译一次；项目名、描述等变量自动转义
+_template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(['html']),
+    auto_reload=False
+)
+
+def get_template(name):
+    """
+    获取已编译的页面模板
+    
+    Args:
+        name (str): templates 目录下的模板文件名
+    
+    Returns:
+        jinja2.Template: 编译后的模板
+    """
+    return _template_env.get_template(name)
+
+def template_version(*names):
+    """模板源码的内容指纹，模板修改后缓存的渲染结果随之失效"""
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(_template_env.loader.get_source(_template_env, name)[0].encode('utf-8'))
+    return digest.hexdigest()[:10]
+
+@functools.lru_cache(maxsize=None)
+def load_stylesheet(name):
+    """
+    读取样式表并计算带内容指纹的引用路径
+    
+    Args:
+        name (str): templates 目录下的样式表文件名，如 report.css
+    
+    Returns:
+        tuple: (样式表内容, 引用路径，如 assets/report.1a2b3c4d5e.css)
+    """
+    with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+        css = f.read()
+    digest = hashlib.sha256(css.encode('utf-8')).hexdigest()[:10]
+    stem, ext = os.path.splitext(name)
+    return css, f"{STYLESHEET_DIR}/{stem}.{digest}{ext}"
+
+def write_stylesheet(name, out_dir='public'):
+    """
+    将样式表写入输出目录，同一内容只写一次
+    
+    旧指纹的样式表不会删除，历史页面仍然引用它们。
+    
+    Args:
+        name (str): templates 目录下的样式表文件名
+        out_dir (str): 输出目录
+    
+    Returns:
+        str: 页面中引用的相对路径
+    """
+    css, href = load_stylesheet(name)
+    path = os.path.join(out_dir, href)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(css)
+        os.replace(tmp_path, path)
+    return href
+
+def build_refined_html(daily, weekly, monthly, current_date=None, registry=None, inline_styles=False):
     """
     构建精美的GitHub Trending日报HTML页面（用于iframe内嵌显示，无顶部栏和侧边栏）
     
     Args:
-        daily (list): 每日热门项目列表
-        weekly (list): 每周热门项目列表
-        monthly (list): 每月热门项目列表
+        daily (list): 每日热门项目列表（Project）
+        weekly (list): 每周热门项目列表（Project）
+        monthly (list): 每月热门项目列表（Project）
         current_date (datetime): 当前日期，默认为None时使用当前时间
+        registry (ProjectRegistry, optional): 项目注册表，同一项目的摘要和正文片段只生成一次
+        inline_styles (bool): 是否内联样式（用于微信推送）；默认引用 public 下的共享样式表
     
     Returns:
         str: 完整的HTML页面内容
     """
-    from ai_processor import get_rich_summary, clean_md_to_html
-    
+    return ''.join(iter_refined_html(daily, weekly, monthly, current_date, registry, inline_styles))
+
+def iter_refined_html(daily, weekly, monthly, current_date=None, registry=None, inline_styles=False):
+    """
+    逐块生成日报HTML页面，参数同 build_refined_html
+
+    所有项目卡片记录一次性传入 report.html 模板，由模板逐块产出，
+    调用方可以直接写入文件而无需拼接整页字符串。引用的共享样式表由 save_html_file 写入。
+
+    Returns:
+        iterator: HTML片段迭代器
+    """
     if current_date is None:
         current_date = datetime.now()
-    date_str = current_date.strftime('%Y / %m / %d')
-    html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GitHub Trending - {date_str}</title>
-    <style>
-        :root {{
-            --primary-color: #0366d6;
-            --background-color: #f6f8fa;
-            --card-background: #ffffff;
-            --text-color: #333333;
-            --border-color: #e1e4e8;
-        }}
-        
-        * {{
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }}
-        
-        html, body {{
-            overflow-x: hidden; /* 防止横向滚动 */
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
-            line-height: 1.6;
-            color: var(--text-color);
-            background-color: var(--background-color);
-        }}
-        
-        /* 内容区域 */
-        .content {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        
-        /* 移动端优化 */
-        @media screen and (max-width: 768px) {{
-            .content {{
-                padding: 10px;
-                width: 100%;
-            }}
-            
-            .project {{
-                padding: 15px;
-            }}
-            
-            .project-title {{
-                font-size: 20px;
-            }}
-            
-            /* 在移动端隐藏圆形导航按钮 */
-            .nav-button {{
-                display: none;
-            }}
-        }}
-        
-        /* 移动端底部导航栏 */
-        @media screen and (max-width: 768px) {{
-            .mobile-nav {{
-                position: fixed;
-                bottom: 0;
-                left: 0;
-                width: 100%;
-                background-color: var(--card-background);
-                display: flex;
-                justify-content: space-around;
-                padding: 10px 0;
-                box-shadow: 0 -2px 10px rgba(0,0,0,0.1);
-                z-index: 1000;
-            }}
-            
-            .mobile-nav-btn {{
-                flex: 1;
-                text-align: center;
-                padding: 10px;
-                color: var(--primary-color);
-                text-decoration: none;
-                font-size: 14px;
-                border-radius: 4px;
-            }}
-            
-            .mobile-nav-btn:hover {{
-                background-color: #f0f0f0;
-            }}
-        }}
-        
-        .project {{
-            background: var(--card-background);
-            margin-bottom: 20px;
-            padding: 20px;
-            border-radius: 6px;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        
-        .project-title {{
-            font-size: 24px;
-            font-weight: 600;
-            margin-bottom: 10px;
-            color: #24292e;
-        }}
-        
-        .project-stats {{
-            font-size: 14px;
-            color: #586069;
-            margin-bottom: 15px;
-        }}
-        
-        .project-content {{
-            margin-bottom: 15px;
-        }}
-        
-        .project-link {{
-            display: inline-block;
-            color: var(--primary-color);
-            text-decoration: none;
-            font-size: 14px;
-        }}
-        
-        .project-link:hover {{
-            text-decoration: underline;
-        }}
-        
-        .section-title {{
-            font-size: 28px;
-            font-weight: 600;
-            margin: 30px 0 20px 0;
-            padding-bottom: 10px;
-            border-bottom: 2px solid var(--border-color);
-            color: #24292e;
-        }}
-        
-        .rank-number {{
-            font-size: 20px;
-            font-weight: bold;
-            color: #666;
-            margin-right: 10px;
-        }}
-        
-        /* 回到顶部和底部按钮 */
-        .nav-button {{
-            position: fixed;
-            width: 50px;
-            height: 50px;
-            border-radius: 50%;
-            background-color: var(--primary-color);
-            color: white;
-            text-align: center;
-            line-height: 50px;
-            font-size: 24px;
-            cursor: pointer;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.2);
-            z-index: 1000;
-            right: 20px;
-            /* 确保按钮不会超出视口导致滚动 */
-            max-width: calc(100vw - 20px);
-        }}
-        
-        .top-button {{
-            top: 50%;
-            transform: translateY(-100%);
-        }}
-        
-        .bottom-button {{
-            top: 58%;
-            transform: translateY(-100%);
-        }}
-        
-        .nav-button:hover {{
-            background-color: #0251a0;
-        }}
-        
-        /* 页脚 */
-        .footer {{
-            text-align: center;
-            padding: 20px;
-            color: #666;
-            font-size: 14px;
-            border-top: 1px solid var(--border-color);
-            margin-top: 30px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="content">
-        <div style="text-align: center; margin-bottom: 20px; color: #666;">
-            <p>{date_str}</p>
-        </div>'''
+    if registry is None:
+        registry = ProjectRegistry(daily, weekly, monthly)
+    sections = [(title, [(p, registry.content_fragment(p)) for p in data])
+                for title, data in (("今日趋势", daily), ("本周热门", weekly), ("月度榜单", monthly)) if data]
+    css, href = load_stylesheet('report.css')
+    return get_template('report.html').generate(
+        date_str=current_date.strftime('%Y / %m / %d'),
+        sections=sections,
+        inline_styles=inline_styles,
+        styles=css.rstrip('\n'),
+        stylesheet=href
+    )
 
-    sections = [("今日趋势", daily), ("本周热门", weekly), ("月度榜单", monthly)]
+def build_wechat_html(daily, weekly, monthly, registry=None):
+    """
+    构建微信公众号图文使用的精简HTML
     
-    for section_title, data in sections:
-        if not data: continue
-        
-        html += f'<div class="section-title">{section_title}</div>'
-        
-        for i, p in enumerate(data):
-            rich_content = get_rich_summary(p)
-            # 关键：将 AI 返回内容中的 MD 语法转化为 HTML
-            rich_content = clean_md_to_html(rich_content)
-            
-            paragraphs = rich_content.split('\n')
-            indented_content = ""
-            for para in paragraphs:
-                if para.strip():
-                    indented_content += f'<p class="project-content">&nbsp;&nbsp;&nbsp;&nbsp;{para.strip()}</p>'
-
-            html += f'''
-            <div class="project">
-                <div>
-                    <span class="rank-number">#{i+1}</span>
-                    <span class="project-title">{p['name']}</span>
-                </div>
-                
-                <div class="project-stats">
-                    <span>总星标: {p['total_stars']}</span> | 
-                    <span>新增星标: {p['added_stars']}</span>
-                    {f' | <span>语言: {p["language"]}</span>' if p.get('language') else ''}
-                </div>
-                
-                <div>
-                    {indented_content}
-                </div>
-                
-                <div>
-                    <a href="{p['link']}" class="project-link" target="_blank">查看项目详情 →</a>
-                    {f' | <a href="https://github.com/{p["user_name"]}" class="project-link" target="_blank">用户主页</a>' if p.get('user_name') else ''}
-                </div>
-            </div>'''
-            
-    html += '''
-            </div>
-            
-            <div style="text-align: center; margin: 30px 0;">
-                <a href="index.html" style="display: inline-block; padding: 10px 20px; background-color: var(--primary-color); color: white; text-decoration: none; border-radius: 4px; font-size: 16px;">← 返回历史日报首页</a>
-            </div>
-            
-            <!-- 回到顶部和底部按钮 -->
-            <div class="nav-button top-button" onclick="window.scrollTo({top: 0, behavior: 'smooth'});">↑</div>
-            <div class="nav-button bottom-button" onclick="window.scrollTo({top: document.body.scrollHeight, behavior: 'smooth'});">↓</div>
-            
-            <!-- 移动端底部导航栏 -->
-            <div class="mobile-nav">
-                <a href="#" class="mobile-nav-btn" onclick="window.scrollTo({top: 0, behavior: 'smooth'});">回到顶部</a>
-                <a href="#footer" class="mobile-nav-btn">跳到底部</a>
-            </div>
-            
-            <div class="footer" id="footer">
-                <p>© 2026 GitHub Trending 日报 | 数据来源于 GitHub Trending</p>
-            </div>
-        </div>
-    </div>
-</body>
-</html>'''
-    return html
+    只包含分区标题和项目卡片，样式全部内联（公众号会丢弃 style 标签、class 和脚本），
+    不含导航按钮、页脚和站内链接。正文段落使用内联样式，摘要与网页共用注册表中的缓存，不会再次调用LLM。
+    
+    Args:
+        daily (list): 每日热门项目列表（Project）
+        weekly (list): 每周热门项目列表（Project）
+        monthly (list): 每月热门项目列表（Project）
+        registry (ProjectRegistry, optional): 项目注册表
+    
+    Returns:
+        str: 图文正文HTML
+    """
+    if registry is None:
+        registry = ProjectRegistry(daily, weekly, monthly)
+    sections = [(title, [(p, registry.content_fragment(p, WECHAT_PARAGRAPH_ATTRS)) for p in data])
+                for title, data in (("今日趋势", daily), ("本周热门", weekly), ("月度榜单", monthly)) if data]
+    return get_template('wechat.html').render(sections=sections)
 
 def save_html_file(html_content, current_date=None):
     """
     保存HTML文件到public目录
     
     Args:
-        html_content (str): HTML内容
+        html_content (str | iterable): HTML内容，或逐块产出的HTML片段（边生成边写入）
         current_date (datetime): 当前日期，默认为None时使用当前时间
     
     Returns:
         str: 文件路径
     """
-    # 创建public目录
+    # 创建public目录，并写入页面引用的共享样式表
     os.makedirs('public', exist_ok=True)
+    write_stylesheet('report.css')
     
     # 生成文件名
     if current_date is None:
@@ -301,7 +178,10 @@ def save_html_file(html_content, current_date=None):
     
     # 保存HTML文件
     with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        if isinstance(html_content, str):
+            f.write(html_content)
+        else:
+            f.writelines(html_content)
     
     print(f"HTML文件已保存: {filepath}")
     return filepath
@@ -322,326 +202,80 @@ def list_trending_pages(out_dir):
     files.sort(reverse=True)
     return files
 
-def generate_index_html(out_dir, latest_file, nav_items):
+def archive_filename(year):
+    """年度归档页面文件名"""
+    return f"archive-{year}.html"
+
+def generate_index_html(out_dir, manifest):
     """
-    生成GitHub Pages索引页面（按年/月分类导航）
+    生成GitHub Pages索引页面：首页展示最近日报并链接到各年度归档页
+    
+    只重新渲染有新页面的月份片段和所在年度的归档页，其余年度的归档页保持不变。
     
     Args:
         out_dir (str): 输出目录
-        latest_file (str): 最新文件名
-        nav_items (list): 导航项列表
+        manifest (PageManifest): 页面清单
     """
-    # 获取所有trending页面并按年月分组
-    pages = list_trending_pages(out_dir)
-    
-    # 按年月分组
-    grouped_pages = {}
-    year_month_list = []  # 用于快速导航
-    
-    for page in pages:
-        match = re.match(r'^trending-(\d{4})-(\d{2})-(\d{2})\.html$', page)
-        if match:
-            year, month, day = match.groups()
-            year_month = f"{year}-{month}"
-            date = f"{year}-{month}-{day}"
-            
-            if year not in grouped_pages:
-                grouped_pages[year] = {}
-            if month not in grouped_pages[year]:
-                grouped_pages[year][month] = []
-            
-            # 获取星期几
-            try:
-                from datetime import datetime
-                dt = datetime(int(year), int(month), int(day))
-                weekdays = ['星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日']
-                weekday = weekdays[dt.weekday()]
-            except:
-                weekday = "未知"
-            
-            grouped_pages[year][month].append({
-                'filename': page,
-                'date': date,
-                'display_date': f"{month}月{day}日",
-                'weekday': weekday
-            })
-            
-            # 添加到年月列表（去重）
-            if year_month not in year_month_list:
-                year_month_list.append(year_month)
+    stylesheet = write_stylesheet('index.css', out_dir)
+    template = get_template('_month_group.html')
+    stale_months = manifest.stale_months(f"{template_version(*ARCHIVE_TEMPLATES)}:{stylesheet}")
+    for month in stale_months:
+        manifest.set_fragment(month, template.render(
+            month=month,
+            month_name=MONTH_NAMES.get(month[5:], f"{month[5:]}月"),
+            pages=manifest.pages(month)
+        ))
     
-    # 生成年月快速导航
-    year_month_nav = ""
-    for year_month in sorted(year_month_list, reverse=True):
-        year, month = year_month.split('-')
-        month_names = {
-            '01': '01月', '02': '02月', '03': '03月', '04': '04月',
-            '05': '05月', '06': '06月', '07': '07月', '08': '08月',
-            '09': '09月', '10': '10月', '11': '11月', '12': '12月'
-        }
-        display_month = month_names.get(month, f"{month}月")
-        year_month_nav += f'            <a href="#{year_month}" class="year-month-item">{year}年{display_month}</a>\n'
-    
-    # 生成按年月分组的内容
-    content_html = ""
-    for year in sorted(grouped_pages.keys(), reverse=True):
-        content_html += f'''        <!-- 按年份分组 -->
-        <div class="year-group">
-            <div class="year-header" id="{year}">{year}年</div>
-            
-'''
-        
-        for month in sorted(grouped_pages[year].keys(), reverse=True):
-            month_names = {
-                '01': '01月', '02': '02月', '03': '03月', '04': '04月',
-                '05': '05月', '06': '06月', '07': '07月', '08': '08月',
-                '09': '09月', '10': '10月', '11': '11月', '12': '12月'
-            }
-            display_month = month_names.get(month, f"{month}月")
-            
-            content_html += f'''            <!-- 按月份分组 -->
-            <div class="month-group">
-                <div class="month-header" id="{year}-{month}">{display_month}</div>
-                <div class="date-list">
-'''
-            
-            for page_info in grouped_pages[year][month]:
-                content_html += f'''                    <a href="{page_info['filename']}" class="date-item">
-                        <div class="date">{page_info['display_date']}</div>
-                        <div class="weekday">{page_info['weekday']}</div>
-                    </a>
-'''
-            
-            content_html += '''                </div>
-            </div>
-            
-'''
-        
-        content_html += '''        </div>
-        
-'''
+    # 有新页面的年份，以及归档页缺失的年份
+    years = manifest.sorted_years()
+    stale_years = {month[:4] for month in stale_months}
+    stale_years.update(year for year, _ in years
+                       if not os.path.exists(os.path.join(out_dir, archive_filename(year))))
+    archive_template = get_template('archive.html')
+    for year in sorted(stale_years):
+        with open(os.path.join(out_dir, archive_filename(year)), 'w', encoding='utf-8') as f:
+            f.write(archive_template.render(
+                year=year,
+                months=manifest.year_months(year),
+                fragments=manifest.fragments,
+                month_names=MONTH_NAMES,
+                stylesheet=stylesheet
+            ))
     
+    html = get_template('index.html').render(
+        years=years,
+        recent_pages=manifest.recent_pages(ARCHIVE_RECENT_DAYS),
+        archive_filename=archive_filename,
+        stylesheet=stylesheet
+    )
     index_path = os.path.join(out_dir, 'index.html')
-    html = '''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GitHub Trending - 历史日报</title>
-    <style>
-        :root {{
-            --primary-color: #0366d6;
-            --background-color: #f6f8fa;
-            --card-background: #ffffff;
-            --text-color: #333333;
-            --border-color: #e1e4e8;
-            --header-height: 60px;
-        }}
-        
-        * {{
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }}
-        
-        html, body {{
-            height: 100%;
-        }}
-        
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
-            line-height: 1.6;
-            color: var(--text-color);
-            background-color: var(--background-color);
-        }}
-        
-        /* 响应式设计 */
-        @media (max-width: 768px) {{
-            :root {{
-                --header-height: 80px;
-            }}
-            
-            .header {{
-                flex-direction: column;
-                height: auto;
-                padding: 10px;
-            }}
-            
-            .header h1 {{
-                font-size: 24px;
-            }}
-            
-            .year-month-nav {{
-                margin: 10px 0;
-            }}
-        }}
-        
-        /* 头部样式 */
-        .header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 0 20px;
-            background: var(--card-background);
-            border-bottom: 1px solid var(--border-color);
-            height: var(--header-height);
-            min-height: var(--header-height);
-            position: sticky;
-            top: 0;
-            z-index: 10;
-        }}
-        
-        .header h1 {{
-            font-size: 28px;
-            color: var(--text-color);
-        }}
-        
-        /* 年月导航 */
-        .year-month-nav {{
-            display: flex;
-            gap: 15px;
-            margin: 20px 0;
-            flex-wrap: wrap;
-        }}
-        
-        .year-month-item {{
-            background: var(--card-background);
-            border: 1px solid var(--border-color);
-            border-radius: 4px;
-            padding: 8px 15px;
-            text-decoration: none;
-            color: var(--text-color);
-            transition: all 0.2s ease;
-        }}
-        
-        .year-month-item:hover {{
-            background: var(--primary-color);
-            color: white;
-            border-color: var(--primary-color);
-        }}
-        
-        /* 内容区域 */
-        .content {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        
-        /* 按年份分组 */
-        .year-group {{
-            margin-bottom: 40px;
-        }}
-        
-        .year-header {{
-            font-size: 24px;
-            font-weight: 600;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 2px solid var(--border-color);
-            color: #24292e;
-        }}
-        
-        /* 按月份分组 */
-        .month-group {{
-            margin-bottom: 30px;
-        }}
-        
-        .month-header {{
-            font-size: 20px;
-            font-weight: 500;
-            margin-bottom: 15px;
-            color: #24292e;
-        }}
-        
-        /* 日期列表 */
-        .date-list {{
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(200px, 1fr));
-            gap: 15px;
-        }}
-        
-        @media (max-width: 768px) {{
-            .date-list {{
-                grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
-            }}
-        }}
-        
-        .date-item {{
-            background: var(--card-background);
-            border: 1px solid var(--border-color);
-            border-radius: 6px;
-            padding: 15px;
-            text-align: center;
-            text-decoration: none;
-            color: var(--text-color);
-            transition: all 0.2s ease;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.1);
-        }}
-        
-        .date-item:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 4px 8px rgba(0,0,0,0.15);
-            border-color: var(--primary-color);
-        }}
-        
-        .date-item .date {{
-            font-size: 18px;
-            font-weight: 600;
-            margin-bottom: 5px;
-        }}
-        
-        .date-item .weekday {{
-            font-size: 14px;
-            color: #666;
-        }}
-        
-        /* 页脚 */
-        .footer {{
-            text-align: center;
-            padding: 20px;
-            color: #666;
-            font-size: 14px;
-            border-top: 1px solid var(--border-color);
-            margin-top: 30px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>GitHub Trending 历史日报</h1>
-    </div>
-    
-    <div class="content">
-        <!-- 年月快速导航 -->
-        <div class="year-month-nav">
-{0}        </div>
-        
-{1}    </div>
-    
-    <div class="footer">
-        <p>© 2026 GitHub Trending 日报 | 数据来源于 GitHub Trending</p>
-    </div>
-</body>
-</html>'''.format(year_month_nav, content_html)
-    
     with open(index_path, 'w', encoding='utf-8') as f:
         f.write(html)
 
-def generate_pages_index():
+def generate_pages_index(*filenames, rebuild=False):
     """
     生成GitHub Pages索引页面
+    
+    新页面追加到页面清单中；清单不存在、记录的页面在public目录中已不存在（如CI中只检出了部分页面），
+    或 rebuild=True 时扫描public目录重建，索引中只列出实际存在的页面。
+    
+    Args:
+        *filenames (str): 本次新生成的页面文件名
+        rebuild (bool): 是否扫描public目录重建清单
     """
     out_dir = 'public'
-    pages = list_trending_pages(out_dir)
-    if not pages:
+    manifest = PageManifest()
+    existing = list_trending_pages(out_dir)
+    missing = manifest.missing(existing)
+    if missing:
+        print(f'Pages manifest lists {len(missing)} pages missing from {out_dir}, rebuilding')
+    if rebuild or not manifest or missing:
+        manifest.rebuild(existing)
+    for filename in filenames:
+        manifest.add(filename)
+    if not manifest:
         print('No trending pages found in', out_dir)
         return
-    latest = pages[0]
-    # Create navigation items
-    nav_items = []
-    for p in pages:
-        m = re.match(r'^trending-(\d{4}-\d{2}-\d{2})\.html$', p)
-        label = m.group(1) if m else p
-        nav_items.append(f'<li><a href="{p}">{label}</a></li>')
-    generate_index_html(out_dir, latest, nav_items)
-    print('Generated index.html with latest:', latest)
\ No newline at end of file
+    generate_index_html(out_dir, manifest)
+    manifest.save()
+    print('Generated index.html with latest:', manifest.latest())
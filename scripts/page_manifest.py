@@ -0,0 +1,178 @@
+import re
+from datetime import datetime
+
+from cache_manager import load_cache, save_cache
+
+# 页面清单文件：记录已生成的日报页面和各月份渲染好的索引片段
+PAGES_MANIFEST_FILE = "data/pages_manifest.json"
+
+PAGE_FILENAME_PATTERN = re.compile(r'^trending-(\d{4})-(\d{2})-(\d{2})\.html$')
+WEEKDAY_NAMES = ['星期一', '星期二', '星期三', '星期四', '星期五', '星期六', '星期日']
+
+def page_record(filename):
+    """
+    解析日报页面文件名，生成索引所需的元数据
+
+    Args:
+        filename (str): 页面文件名，如 trending-2026-01-02.html
+
+    Returns:
+        dict: filename、date、display_date、weekday，文件名不匹配时返回None
+    """
+    match = PAGE_FILENAME_PATTERN.match(filename)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    try:
+        weekday = WEEKDAY_NAMES[datetime(int(year), int(month), int(day)).weekday()]
+    except ValueError:
+        weekday = "未知"
+    return {
+        'filename': filename,
+        'date': f"{year}-{month}-{day}",
+        'display_date': f"{month}月{day}日",
+        'weekday': weekday
+    }
+
+class PageManifest:
+    """
+    日报页面清单
+
+    页面按月份（YYYY-MM）分组记录，每个月份缓存一份渲染好的索引片段。
+    新增页面只会标记所在月份需要重新渲染，索引页由缓存的片段拼接而成。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or PAGES_MANIFEST_FILE
+        data = load_cache(self.path)
+        # 月份 -> {日期: 页面元数据}
+        self.months = data.get('months', {})
+        # 月份 -> 渲染好的索引片段
+        self.fragments = data.get('fragments', {})
+        self.fragment_version = data.get('fragment_version')
+        self.dirty_months = set()
+
+    def __len__(self):
+        return sum(len(pages) for pages in self.months.values())
+
+    def add(self, filename):
+        """
+        记录一个日报页面
+
+        Returns:
+            bool: 是否为新页面（或元数据有变化）
+        """
+        record = page_record(filename)
+        if record is None:
+            return False
+        month = record['date'][:7]
+        pages = self.months.setdefault(month, {})
+        if pages.get(record['date']) == record:
+            return False
+        pages[record['date']] = record
+        self.dirty_months.add(month)
+        return True
+
+    def missing(self, filenames):
+        """
+        获取清单中有记录但不在给定页面列表中的页面
+
+        Args:
+            filenames (list): 输出目录中实际存在的页面文件名
+
+        Returns:
+            list: 缺失的页面文件名
+        """
+        existing = set(filenames)
+        return [record['filename'] for pages in self.months.values() for record in pages.values()
+                if record['filename'] not in existing]
+
+    def rebuild(self, filenames):
+        """根据完整的页面列表重建清单，所有月份片段都需要重新渲染"""
+        self.months = {}
+        self.fragments = {}
+        for filename in filenames:
+            self.add(filename)
+
+    def pages(self, month):
+        """
+        获取某个月份的页面元数据
+
+        Returns:
+            list: 按日期倒序排列的页面元数据
+        """
+        pages = self.months.get(month, {})
+        return [pages[date] for date in sorted(pages, reverse=True)]
+
+    def sorted_months(self):
+        """所有月份（YYYY-MM），从新到旧"""
+        return sorted(self.months, reverse=True)
+
+    def sorted_years(self):
+        """
+        所有年份及其页面数，从新到旧
+
+        Returns:
+            list: (年份, 页面数) 列表
+        """
+        counts = {}
+        for month, pages in self.months.items():
+            counts[month[:4]] = counts.get(month[:4], 0) + len(pages)
+        return sorted(counts.items(), reverse=True)
+
+    def year_months(self, year):
+        """某一年的所有月份（YYYY-MM），从新到旧"""
+        return [month for month in self.sorted_months() if month.startswith(f"{year}-")]
+
+    def recent_pages(self, limit):
+        """
+        最近的若干个页面
+
+        Args:
+            limit (int): 页面数上限
+
+        Returns:
+            list: 按日期倒序排列的页面元数据
+        """
+        recent = []
+        for month in self.sorted_months():
+            recent.extend(self.pages(month)[:limit - len(recent)])
+            if len(recent) >= limit:
+                break
+        return recent
+
+    def latest(self):
+        """最新的页面文件名，清单为空时返回None"""
+        if not self.months:
+            return None
+        return self.pages(self.sorted_months()[0])[0]['filename']
+
+    def stale_months(self, fragment_version):
+        """
+        获取需要重新渲染片段的月份
+
+        模板或样式表变化（fragment_version 不同）时所有月份都需要重新渲染。
+
+        Args:
+            fragment_version (str): 片段模板及样式表的版本标识
+
+        Returns:
+            list: 月份列表
+        """
+        if fragment_version != self.fragment_version:
+            self.fragment_version = fragment_version
+            self.dirty_months.update(self.months)
+        self.dirty_months.update(month for month in self.months if month not in self.fragments)
+        return sorted(self.dirty_months)
+
+    def set_fragment(self, month, html):
+        """缓存某个月份渲染好的索引片段"""
+        self.fragments[month] = html
+        self.dirty_months.discard(month)
+
+    def save(self):
+        save_cache({
+            'fragment_version': self.fragment_version,
+            'months': self.months,
+            'fragments': self.fragments
+        }, self.path)
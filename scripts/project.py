@@ -0,0 +1,108 @@
+import re
+
+# 时间范围对应的新增星标文案
+PERIOD_LABELS = {
+    'daily': 'today',
+    'weekly': 'this week',
+    'monthly': 'this month'
+}
+
+def parse_star_count(text):
+    """
+    将 "12,345" 或 "1,024 stars today" 形式的文本解析为整数
+
+    Args:
+        text (str): 星标文本
+
+    Returns:
+        int: 星标数，无法解析时返回0
+    """
+    match = re.search(r'\d[\d,]*', text or "")
+    return int(match.group(0).replace(',', '')) if match else 0
+
+class Project:
+    """
+    GitHub Trending 项目记录
+
+    星标数以整数保存，展示用的字符串按需生成，便于排序、阈值过滤和差值计算。
+    """
+
+    __slots__ = ('owner', 'repo', 'desc', 'language', 'total_stars', 'added_stars', 'period', 'rank')
+
+    def __init__(self, owner, repo, desc="", language="", total_stars=0, added_stars=0,
+                 period='daily', rank=0):
+        self.owner = owner
+        self.repo = repo
+        self.desc = desc
+        self.language = language
+        self.total_stars = total_stars
+        self.added_stars = added_stars
+        self.period = period
+        self.rank = rank
+
+    @classmethod
+    def from_name(cls, name, **kwargs):
+        """根据 "owner/repo" 形式的名称创建项目记录"""
+        owner, _, repo = name.partition('/') if '/' in name else ("", "", name)
+        return cls(owner, repo, **kwargs)
+
+    @property
+    def name(self):
+        """项目全名 owner/repo"""
+        return f"{self.owner}/{self.repo}" if self.owner else self.repo
+
+    @property
+    def link(self):
+        return f"https://github.com/{self.name}"
+
+    @property
+    def user_name(self):
+        return self.owner
+
+    @property
+    def total_stars_display(self):
+        """总星标展示文本，如 "12,345" """
+        return f"{self.total_stars:,}"
+
+    @property
+    def added_stars_display(self):
+        """新增星标展示文本，如 "1,024 stars today" """
+        unit = "star" if self.added_stars == 1 else "stars"
+        label = PERIOD_LABELS.get(self.period)
+        return f"{self.added_stars:,} {unit} {label}" if label else f"{self.added_stars:,} {unit}"
+
+    def to_dict(self):
+        """
+        转换为展示用的字典（与旧版抓取结果的字段和格式一致）
+
+        Returns:
+            dict: 包含项目信息的字典
+        """
+        return {
+            "name": self.name,
+            "link": self.link,
+            "desc": self.desc,
+            "user_name": self.user_name,
+            "language": self.language,
+            "total_stars": self.total_stars_display,
+            "added_stars": self.added_stars_display
+        }
+
+    def to_record(self):
+        """转换为可JSON序列化的紧凑记录"""
+        return [self.owner, self.repo, self.desc, self.language,
+                self.total_stars, self.added_stars, self.period, self.rank]
+
+    @classmethod
+    def from_record(cls, record):
+        """从 to_record 生成的记录还原项目"""
+        return cls(*record)
+
+    def __eq__(self, other):
+        if not isinstance(other, Project):
+            return NotImplemented
+        return self.to_record() == other.to_record()
+
+    def __repr__(self):
+        return (f"Project({self.name!r}, total_stars={self.total_stars}, "
+                f"added_stars={self.added_stars}, period={self.period!r}, rank={self.rank})")
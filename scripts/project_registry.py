@@ -0,0 +1,92 @@
+import html
+
+# 网页中项目正文段落的属性（样式由 report.css 提供）
+CONTENT_PARAGRAPH_ATTRS = 'class="project-content"'
+
+class ProjectRegistry:
+    """
+    单次运行内的项目注册表
+
+    按 owner/repo 对日榜、周榜、月榜中的项目去重，摘要查询、Markdown转HTML
+    以及项目卡片正文片段对每个项目只计算一次，在各个榜单中复用。
+    """
+
+    def __init__(self, *ranges, summarize=None):
+        """
+        Args:
+            *ranges (list): 各时间范围的Project列表
+            summarize (callable, optional): 摘要生成函数，默认为 ai_processor.get_rich_summary
+        """
+        self._projects = {}
+        self._summaries = {}
+        self._fragments = {}
+        self._summarize = summarize
+        for projects in ranges:
+            self.add(projects)
+
+    def add(self, projects):
+        """登记项目，同名项目只保留第一次出现的记录"""
+        for p in projects:
+            self._projects.setdefault(p.name, p)
+
+    def unique_projects(self):
+        """
+        Returns:
+            list: 去重后的Project列表（按首次出现顺序）
+        """
+        return list(self._projects.values())
+
+    def __len__(self):
+        return len(self._projects)
+
+    def __contains__(self, name):
+        return name in self._projects
+
+    def summary(self, p):
+        """
+        获取项目摘要（每个项目只查询一次缓存或LLM）
+
+        Args:
+            p (Project): 项目记录
+
+        Returns:
+            str: 项目摘要
+        """
+        if p.name not in self._summaries:
+            if self._summarize is None:
+                from ai_processor import get_rich_summary
+                self._summarize = get_rich_summary
+            self._summaries[p.name] = self._summarize(self._projects.get(p.name, p))
+        return self._summaries[p.name]
+
+    def set_summaries(self, summaries):
+        """
+        批量写入已生成的摘要
+
+        Args:
+            summaries (dict): 项目名 -> 摘要
+        """
+        self._summaries.update(summaries)
+
+    def content_fragment(self, p, paragraph_attrs=CONTENT_PARAGRAPH_ATTRS):
+        """
+        获取项目卡片的正文片段（摘要段落），每种段落属性的Markdown转HTML只执行一次
+
+        Args:
+            p (Project): 项目记录
+            paragraph_attrs (str): 段落 <p> 标签的属性，不支持 class 的目标（如公众号）传入内联样式
+
+        Returns:
+            str: 正文HTML片段
+        """
+        key = (p.name, paragraph_attrs)
+        if key not in self._fragments:
+            from ai_processor import clean_md_to_html
+
+            # 摘要含 LLM 输出和原始项目描述，先转义再将 MD 语法转化为 HTML
+            rich_content = clean_md_to_html(html.escape(self.summary(p), quote=False))
+            self._fragments[key] = ''.join(
+                f'<p {paragraph_attrs}>&nbsp;&nbsp;&nbsp;&nbsp;{para.strip()}</p>'
+                for para in rich_content.split('\n') if para.strip()
+            )
+        return self._fragments[key]
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+
+from cache_manager import load_cache, save_cache
+
+# 发布记录文件：按 (日期, 渠道, 接收者) 记录投递状态
+PUBLISH_OUTBOX_FILE = "data/publish_outbox.json"
+# 每次运行中单个接收者的最大投递次数
+PUBLISH_MAX_ATTEMPTS = int(os.environ.get("PUBLISH_MAX_ATTEMPTS", "3"))
+# 重试前的初始等待时间（秒），之后每轮翻倍
+PUBLISH_RETRY_BACKOFF = float(os.environ.get("PUBLISH_RETRY_BACKOFF", "2"))
+# 发布记录保留天数（按最后更新时间计算）
+PUBLISH_OUTBOX_RETENTION_DAYS = int(os.environ.get("PUBLISH_OUTBOX_RETENTION_DAYS", "60"))
+
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+def delivery_key(date, channel, target):
+    """投递的幂等键"""
+    return f"{date}|{channel}|{target}"
+
+def delivery_uuid(date, channel, target):
+    """
+    投递幂等键的短哈希，作为渠道接口的请求去重标识（飞书发送消息接口的 uuid 不超过50个字符）
+    """
+    return hashlib.sha256(delivery_key(date, channel, target).encode('utf-8')).hexdigest()[:32]
+
+class PublishOutbox:
+    """
+    持久化的发布记录
+
+    每个 (日期, 渠道, 接收者) 的投递结果在每轮发送后立即写回文件，
+    重新运行或补发时只投递尚未成功的部分，已成功的投递不会重复发送。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or PUBLISH_OUTBOX_FILE
+        self._entries = load_cache(self.path)
+        self._lock = threading.Lock()
+
+    def is_sent(self, date, channel, target):
+        entry = self._entries.get(delivery_key(date, channel, target))
+        return bool(entry) and entry.get("status") == STATUS_SENT
+
+    def pending(self, date, channel, targets):
+        """
+        过滤出尚未成功投递的接收者
+
+        Returns:
+            list: 接收者标识列表（保持原有顺序）
+        """
+        with self._lock:
+            return [target for target in targets if not self.is_sent(date, channel, target)]
+
+    def record(self, date, channel, results):
+        """
+        记录一轮投递结果并立即写回文件
+
+        Args:
+            date (str): 日报日期（YYYY-MM-DD）
+            channel (str): 渠道名
+            results (dict): 接收者标识 -> 发布结果（ok、error）
+        """
+        now = datetime.now().isoformat()
+        with self._lock:
+            for target, result in results.items():
+                key = delivery_key(date, channel, target)
+                attempts = self._entries.get(key, {}).get("attempts", 0) + 1
+                self._entries[key] = {
+                    "status": STATUS_SENT if result.get("ok") else STATUS_FAILED,
+                    "attempts": attempts,
+                    "error": result.get("error"),
+                    "updated_at": now
+                }
+            self._save()
+
+    def _save(self):
+        # 清理超过保留期未更新的记录，文件大小不随时间增长
+        cutoff = (datetime.now() - timedelta(days=PUBLISH_OUTBOX_RETENTION_DAYS)).isoformat()
+        self._entries = {key: entry for key, entry in self._entries.items() if entry.get("updated_at", "") >= cutoff}
+        save_cache(self._entries, self.path)
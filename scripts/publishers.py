@@ -0,0 +1,294 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from feishu_publisher import get_receive_ids, publish_to_feishu_app, publish_to_feishu_webhook
+from page_generator import build_refined_html, build_wechat_html
+from publish_outbox import PUBLISH_MAX_ATTEMPTS, PUBLISH_RETRY_BACKOFF, delivery_uuid
+from wechat_publisher import publish_to_wechat
+
+# 单个渠道的默认发布超时（秒）
+PUBLISH_TIMEOUT = float(os.environ.get("PUBLISH_TIMEOUT", "120"))
+# 启用的渠道（逗号分隔），默认启用所有配置齐全的渠道
+PUBLISH_CHANNELS = os.environ.get("PUBLISH_CHANNELS", "")
+
+# 只有一个接收方的渠道使用的接收者标识
+DEFAULT_TARGET = "default"
+
+# 仍可能有渠道线程在运行的线程池（见 wait_publishers）
+_executors = []
+
+class Publisher:
+    """
+    发布渠道
+
+    子类声明所需的环境变量（required_env）和使用的渲染内容（render_target），
+    并实现 send；有多个接收方的渠道还需实现 resolve_targets。send 每次只投递一轮，
+    失败重试统一由 _run_channel 负责。
+    """
+
+    name = ""
+    # 渠道启用所需的环境变量
+    required_env = ()
+    # 发布内容的渲染目标，对应 RENDERERS 及 publish_all 的 contents 中的键；None 表示不使用渲染内容
+    render_target = "html"
+    # 发布超时（秒），None 表示使用 PUBLISH_TIMEOUT
+    timeout = None
+
+    def missing_env(self):
+        """未配置的环境变量列表"""
+        return [key for key in self.required_env if not os.environ.get(key)]
+
+    def is_enabled(self):
+        return not self.missing_env()
+
+    def resolve_targets(self):
+        """
+        获取接收方列表
+
+        Returns:
+            list: 接收者标识列表
+        """
+        return [DEFAULT_TARGET]
+
+    def send(self, content, current_date, targets, timeout=None):
+        """
+        向接收方发布内容（不重试）
+
+        Args:
+            content (str): 渲染好的发布内容
+            current_date (datetime): 日报日期
+            targets (list): 接收者标识列表（resolve_targets 的子集）
+            timeout (float, optional): 本轮剩余的时间（秒），用作请求超时
+
+        Returns:
+            dict: 接收者标识 -> 发布结果（ok、error，失败时可选 retryable：是否可重试，默认可重试；
+                retry_after：重试前至少等待的秒数）
+        """
+        raise NotImplementedError
+
+class WeChatPublisher(Publisher):
+    """微信公众号（经由推送服务）"""
+
+    name = "wechat"
+    required_env = ("SERVER_URL", "SERVER_API_KEY")
+    render_target = "wechat"
+
+    def send(self, content, current_date, targets, timeout=None):
+        return {DEFAULT_TARGET: publish_to_wechat(content, current_date, timeout)}
+
+class FeishuWebhookPublisher(Publisher):
+    """飞书群机器人Webhook"""
+
+    name = "feishu_webhook"
+    required_env = ("FEISHU_WEBHOOK_URL",)
+    # 只发送日报页面链接
+    render_target = None
+
+    def send(self, content, current_date, targets, timeout=None):
+        return {DEFAULT_TARGET: publish_to_feishu_webhook(content, current_date, timeout)}
+
+class FeishuAppPublisher(Publisher):
+    """飞书应用消息（按接收者并发发送，以投递幂等键的哈希作为消息 uuid，重复投递由飞书去重）"""
+
+    name = "feishu_app"
+    required_env = ("FEISHU_APP_ID", "FEISHU_APP_SECRET", "FEISHU_RECEIVE_IDS")
+    # 只发送日报页面链接
+    render_target = None
+
+    def resolve_targets(self):
+        return list(dict.fromkeys(get_receive_ids()))
+
+    def send(self, content, current_date, targets, timeout=None):
+        date = current_date.strftime('%Y-%m-%d')
+        uuids = {target: delivery_uuid(date, self.name, target) for target in targets}
+        results = publish_to_feishu_app(content, current_date, targets, retries=0, timeout=timeout, uuids=uuids)
+        # 获取令牌失败等情况下没有逐个接收者的结果，请求未发出，可以重试
+        return {target: results.get(target, {"ok": False, "error": "未发送", "retryable": True}) for target in targets}
+
+# 已注册的发布渠道
+PUBLISHERS = {
+    WeChatPublisher.name: WeChatPublisher,
+    FeishuWebhookPublisher.name: FeishuWebhookPublisher,
+    FeishuAppPublisher.name: FeishuAppPublisher
+}
+
+def register_publisher(publisher_cls):
+    """注册发布渠道（可用作类装饰器）"""
+    PUBLISHERS[publisher_cls.name] = publisher_cls
+    return publisher_cls
+
+def render_inline_html(daily, weekly, monthly, current_date, registry):
+    """内联样式的完整日报页面"""
+    return build_refined_html(daily, weekly, monthly, current_date, registry, inline_styles=True)
+
+def render_wechat_html(daily, weekly, monthly, current_date, registry):
+    """只含项目卡片的公众号精简版"""
+    return build_wechat_html(daily, weekly, monthly, registry)
+
+# 渲染目标 -> 渲染函数 (daily, weekly, monthly, current_date, registry) -> 发布内容
+RENDERERS = {
+    "html": render_inline_html,
+    "wechat": render_wechat_html
+}
+
+def register_renderer(target, renderer):
+    """注册渲染目标"""
+    RENDERERS[target] = renderer
+    return renderer
+
+def render_contents(publishers, daily, weekly, monthly, current_date, registry):
+    """
+    渲染发布渠道需要的内容，每个渲染目标只渲染一次
+
+    Args:
+        publishers (list): Publisher 实例列表
+        daily (list): 每日热门项目列表（Project）
+        weekly (list): 每周热门项目列表（Project）
+        monthly (list): 每月热门项目列表（Project）
+        current_date (datetime): 日报日期
+        registry (ProjectRegistry): 项目注册表
+
+    Returns:
+        dict: 渲染目标 -> 发布内容（未注册的渲染目标不包含在内，由 publish_all 报告）
+    """
+    contents = {}
+    for target in dict.fromkeys(publisher.render_target for publisher in publishers):
+        if target is None:
+            continue
+        renderer = RENDERERS.get(target)
+        if renderer is None:
+            print(f"未知的渲染目标: {target}，可选: {', '.join(RENDERERS)}")
+            continue
+        contents[target] = renderer(daily, weekly, monthly, current_date, registry)
+    return contents
+
+def enabled_publishers():
+    """
+    获取已启用的发布渠道
+
+    PUBLISH_CHANNELS 未设置时启用所有配置齐全的渠道；缺少配置的渠道会被跳过并提示。
+
+    Returns:
+        list: Publisher 实例列表
+    """
+    names = [name.strip() for name in PUBLISH_CHANNELS.split(',') if name.strip()] or list(PUBLISHERS)
+    publishers = []
+    for name in names:
+        publisher_cls = PUBLISHERS.get(name)
+        if publisher_cls is None:
+            print(f"未知的发布渠道: {name}，可选: {', '.join(PUBLISHERS)}")
+            continue
+        publisher = publisher_cls()
+        missing = publisher.missing_env()
+        if missing:
+            print(f"跳过发布渠道 {name}: 未配置 {', '.join(missing)}")
+            continue
+        publishers.append(publisher)
+    return publishers
+
+def _run_channel(publisher, content, current_date, outbox=None, deadline=None):
+    """
+    向一个渠道的所有接收方发布
+
+    可重试的失败在退避后重试（等待时间取退避时间与渠道要求的 retry_after 中较大者），最多 PUBLISH_MAX_ATTEMPTS 轮
+    （渠道自身不再重试）；不可重试的失败不再发送。每轮开始前检查剩余时间，等待后已没有剩余时间时不再重试，
+    剩余时间同时作为本轮的请求超时。
+    使用发布记录时跳过当天已成功投递的接收者，每轮结果都写入发布记录。
+
+    Args:
+        deadline (float, optional): 截止时间（time.monotonic()），默认不限制
+    """
+    targets = publisher.resolve_targets()
+    date = current_date.strftime('%Y-%m-%d')
+    pending = outbox.pending(date, publisher.name, targets) if outbox else list(targets)
+    results = {target: {"ok": True, "error": None, "skipped": True} for target in targets if target not in pending}
+    retry_after = 0
+    for attempt in range(PUBLISH_MAX_ATTEMPTS):
+        if not pending:
+            break
+        delay = max(PUBLISH_RETRY_BACKOFF * 2 ** (attempt - 1), retry_after) if attempt else 0
+        remaining = None if deadline is None else deadline - time.monotonic() - delay
+        if remaining is not None and remaining <= 0:
+            break
+        time.sleep(delay)
+        round_results = publisher.send(content, current_date, pending, remaining)
+        if outbox:
+            outbox.record(date, publisher.name, round_results)
+        results.update(round_results)
+        retry = {target: round_results.get(target, {}) for target in pending}
+        retry = {target: result for target, result in retry.items()
+                 if not result.get("ok") and result.get("retryable", True)}
+        pending = list(retry)
+        retry_after = max((result.get("retry_after") or 0 for result in retry.values()), default=0)
+    return results
+
+def publish_all(contents, current_date, publishers=None, outbox=None):
+    """
+    并发发布到所有启用的渠道
+
+    每个渠道在独立线程中运行，超过各自的超时时间后不再等待，在报告中记为超时。
+    超时的渠道线程无法中止，会在后台继续运行（每轮请求的超时不超过渠道的剩余时间，
+    但获取令牌等步骤可能超出）；关闭共享会话前应调用 wait_publishers 等待其结束。
+
+    Args:
+        contents (dict): 渲染目标 -> 发布内容（见 render_contents），缺少渠道所需内容的渠道不发布并在报告中记为失败
+        current_date (datetime): 日报日期
+        publishers (list, optional): Publisher 实例列表，默认为 enabled_publishers()
+        outbox (PublishOutbox, optional): 发布记录，提供时跳过已成功的投递并记录每轮结果
+
+    Returns:
+        dict: 渠道名 -> {接收者标识: 发布结果}
+    """
+    if publishers is None:
+        publishers = enabled_publishers()
+    if not publishers:
+        print("没有启用的发布渠道")
+        return {}
+
+    report = {}
+    for publisher in publishers:
+        if publisher.render_target is not None and publisher.render_target not in contents:
+            report[publisher.name] = {DEFAULT_TARGET: {"ok": False, "error": f"缺少渲染内容: {publisher.render_target}"}}
+    publishers = [publisher for publisher in publishers if publisher.name not in report]
+
+    started_at = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max(1, len(publishers)))
+    _executors.append(executor)
+    futures = {
+        publisher.name: executor.submit(_run_channel, publisher, contents.get(publisher.render_target),
+                                        current_date, outbox, started_at + (publisher.timeout or PUBLISH_TIMEOUT))
+        for publisher in publishers
+    }
+    executor.shutdown(wait=False)
+
+    for publisher in publishers:
+        timeout = publisher.timeout or PUBLISH_TIMEOUT
+        remaining = max(0.0, started_at + timeout - time.monotonic())
+        try:
+            report[publisher.name] = futures[publisher.name].result(timeout=remaining)
+        except FutureTimeoutError:
+            report[publisher.name] = {DEFAULT_TARGET: {"ok": False, "error": f"超时（{timeout:g}秒）"}}
+        except Exception as e:
+            report[publisher.name] = {DEFAULT_TARGET: {"ok": False, "error": f"发布异常: {e}"}}
+
+    print_publish_report(report, time.monotonic() - started_at)
+    return report
+
+def wait_publishers():
+    """等待 publish_all 中超时后仍在运行的渠道线程结束"""
+    while _executors:
+        _executors.pop().shutdown(wait=True)
+
+def print_publish_report(report, elapsed=None):
+    """输出各渠道的发布结果汇总"""
+    print("发布结果汇总" + (f"（耗时 {elapsed:.1f} 秒）" if elapsed is not None else "") + ":")
+    for name, results in report.items():
+        failed = {target: result for target, result in results.items() if not result.get("ok")}
+        skipped = sum(1 for result in results.values() if result.get("skipped"))
+        line = f"  {name}: 成功 {len(results) - len(failed) - skipped} 个, 失败 {len(failed)} 个"
+        if skipped:
+            line += f", 此前已发送跳过 {skipped} 个"
+        print(line)
+        for target, result in failed.items():
+            print(f"    {target}: {result.get('error')}")
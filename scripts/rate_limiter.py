@@ -0,0 +1,42 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限流器
+
+    令牌以固定速率补充，桶容量决定允许的瞬时突发量；acquire 在令牌不足时阻塞等待。
+    """
+
+    def __init__(self, rate, capacity=1):
+        """
+        Args:
+            rate (float): 每秒补充的令牌数
+            capacity (int): 桶容量（最大突发请求数）
+        """
+        self.rate = float(rate)
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, count, capacity=1):
+        """按每分钟请求数创建限流器"""
+        return cls(count / 60.0, capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, tokens=1):
+        """获取令牌，令牌不足时阻塞直到可用"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
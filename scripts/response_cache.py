@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+
+# 响应缓存文件路径
+RESPONSE_CACHE_FILE = "data/trending_response_cache.json"
+# 新鲜期（秒）：在此时间内直接复用解析结果，不发起请求
+RESPONSE_CACHE_MAX_AGE = int(os.environ.get("TRENDING_CACHE_MAX_AGE", "900"))
+
+_cache = None
+_dirty = False
+_lock = threading.Lock()
+
+def _load():
+    """加载响应缓存（每个进程只读取一次磁盘）"""
+    global _cache
+    if _cache is None:
+        try:
+            with open(RESPONSE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                _cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _cache = {}
+    return _cache
+
+def get_cached_response(url):
+    """
+    获取URL对应的缓存条目
+
+    Args:
+        url (str): 请求URL
+
+    Returns:
+        dict: 包含etag、last_modified、fetched_at和解析结果的条目，不存在时返回None
+    """
+    with _lock:
+        return _load().get(url)
+
+def is_response_fresh(entry, max_age=None):
+    """检查缓存条目是否仍在新鲜期内"""
+    if max_age is None:
+        max_age = RESPONSE_CACHE_MAX_AGE
+    return time.time() - entry.get('fetched_at', 0) < max_age
+
+def conditional_headers(entry):
+    """
+    根据缓存条目构造条件请求头
+
+    Returns:
+        dict: If-None-Match / If-Modified-Since 请求头
+    """
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+def store_response(url, etag, last_modified, payload):
+    """
+    缓存URL的校验头及解析结果
+
+    Args:
+        url (str): 请求URL
+        etag (str): 响应的ETag头
+        last_modified (str): 响应的Last-Modified头
+        payload: 可JSON序列化的解析结果
+    """
+    global _dirty
+    with _lock:
+        _load()[url] = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+            'payload': payload
+        }
+        _dirty = True
+
+def touch_response(url):
+    """服务器返回304时刷新条目的获取时间"""
+    global _dirty
+    with _lock:
+        entry = _load().get(url)
+        if entry:
+            entry['fetched_at'] = time.time()
+            _dirty = True
+
+def save_response_cache():
+    """将有变更的响应缓存写回磁盘"""
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(RESPONSE_CACHE_FILE), exist_ok=True)
+            with open(RESPONSE_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(_cache, f, ensure_ascii=False)
+            _dirty = False
+        except Exception as e:
+            print(f"保存响应缓存失败: {e}")
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+基于SQLite的摘要缓存
+
+以项目名为主键、按时间戳建立索引，支持批量读写和一次性删除过期条目。
+用法（从JSON缓存一次性导入）:
+    python scripts/sqlite_cache.py import [JSON缓存路径] [SQLite路径]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import cache_manager
+
+# SQLite缓存文件路径
+SQLITE_CACHE_FILE = "data/project_summaries_cache.sqlite3"
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS summaries (
+    project_name TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'ok',
+    project TEXT,
+    last_hit REAL,
+    failures INTEGER NOT NULL DEFAULT 1,
+    first_failed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries (timestamp);
+'''
+
+# 旧版数据库缺少的列
+_MIGRATIONS = {
+    'status': "ALTER TABLE summaries ADD COLUMN status TEXT NOT NULL DEFAULT 'ok'",
+    'project': "ALTER TABLE summaries ADD COLUMN project TEXT",
+    'last_hit': "ALTER TABLE summaries ADD COLUMN last_hit REAL",
+    'failures': "ALTER TABLE summaries ADD COLUMN failures INTEGER NOT NULL DEFAULT 1",
+    'first_failed_at': "ALTER TABLE summaries ADD COLUMN first_failed_at REAL"
+}
+
+# 覆盖写入已有条目：失败条目再次失败时累计失败次数并保留首次失败时间（失败写入的 failures 为1，正常写入为0）
+_UPSERT_SET = (
+    'UPDATE SET summary = excluded.summary, timestamp = excluded.timestamp, status = excluded.status, '
+    'project = excluded.project, last_hit = NULL, '
+    'failures = CASE WHEN excluded.failures > 0 AND summaries.status = excluded.status '
+    'THEN summaries.failures + 1 ELSE excluded.failures END, '
+    'first_failed_at = CASE WHEN excluded.failures > 0 AND summaries.status = excluded.status '
+    'THEN COALESCE(summaries.first_failed_at, summaries.timestamp) ELSE excluded.first_failed_at END'
+)
+
+# LRU淘汰顺序：最近命中时间，从未命中的按写入时间
+_LRU_ORDER = 'COALESCE(last_hit, timestamp)'
+
+class SqliteSummaryCache:
+    """
+    SQLite摘要缓存（WAL模式）
+
+    接口与 cache_manager.SummaryCache 一致：写入在事务中累积，flush 时提交。
+    """
+
+    def __init__(self, path=None):
+        self.path = path or SQLITE_CACHE_FILE
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(summaries)')}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+        self._conn.execute(f'CREATE INDEX IF NOT EXISTS idx_summaries_lru ON summaries ({_LRU_ORDER})')
+        self._conn.commit()
+        self._committed_changes = self._conn.total_changes
+        self._lock = threading.Lock()
+
+    def lookup_many(self, keys):
+        """
+        批量查询摘要及其状态
+
+        Args:
+            keys (list): 缓存键列表
+
+        Returns:
+            dict: 缓存键 -> (摘要, 状态)，仅包含可用的条目
+        """
+        keys = list(keys)
+        result = {}
+        now = time.time()
+        with self._lock:
+            # 分批查询，避免超过SQLite的参数个数上限
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT project_name, summary, timestamp, status, failures FROM summaries '
+                    f'WHERE project_name IN ({placeholders})',
+                    chunk
+                )
+                for key, summary, timestamp, status, failures in rows:
+                    state = cache_manager.entry_state(status, now - timestamp, failures)
+                    if state:
+                        result[key] = (summary, state)
+            # 记录最近命中时间，用于LRU淘汰
+            self._conn.executemany('UPDATE summaries SET last_hit = ? WHERE project_name = ?',
+                                   ((now, key) for key in result))
+        return result
+
+    def get(self, key):
+        """获取可用的摘要"""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        批量获取可用的摘要
+
+        Returns:
+            dict: 缓存键 -> 摘要（仅包含命中的条目）
+        """
+        return {key: summary for key, (summary, _) in self.lookup_many(keys).items()}
+
+    def put(self, key, summary, status=cache_manager.STATUS_OK, project=None):
+        """写入摘要（flush 时提交）"""
+        self.put_many({key: summary}, status, {key: project} if project else None)
+
+    def put_many(self, summaries, status=cache_manager.STATUS_OK, projects=None):
+        """
+        批量写入摘要
+
+        Args:
+            summaries (dict): 缓存键 -> 摘要
+            status (str): 条目状态，STATUS_FAILED 表示生成失败的兜底摘要
+            projects (dict, optional): 缓存键 -> Project，失败条目据此在后续运行中重试
+        """
+        now = time.time()
+        projects = projects or {}
+        failed = status == cache_manager.STATUS_FAILED
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO summaries (project_name, summary, timestamp, status, project, failures, first_failed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (project_name) DO ' + _UPSERT_SET,
+                ((key, summary, now, status,
+                  json.dumps(projects[key].to_record(), ensure_ascii=False) if projects.get(key) else None,
+                  1 if failed else 0, now if failed else None)
+                 for key, summary in summaries.items())
+            )
+
+    def retry_queue(self, limit=None):
+        """
+        获取待重试的失败条目（不含已达到最大失败次数的条目）
+
+        Returns:
+            list: (缓存键, Project记录) 列表，按失败时间从早到晚排序
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT project_name, project FROM summaries '
+                'WHERE status = ? AND project IS NOT NULL AND failures < ? ORDER BY timestamp LIMIT ?',
+                (cache_manager.STATUS_FAILED, cache_manager.SUMMARY_MAX_FAILURES, -1 if limit is None else limit)
+            ).fetchall()
+        return [(key, json.loads(record)) for key, record in rows]
+
+    def expire(self):
+        """
+        删除所有过期条目（规则同 cache_manager.is_entry_expired）
+
+        Returns:
+            int: 删除的条目数
+        """
+        now = time.time()
+        ttl = cache_manager.CACHE_EXPIRY_DAYS * 86400
+        grace = cache_manager.STALE_GRACE_DAYS * 86400
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM summaries WHERE (status = ? AND COALESCE(first_failed_at, timestamp) < ?) '
+                'OR timestamp < ?',
+                (cache_manager.STATUS_FAILED, now - ttl, now - ttl - grace)
+            )
+            return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+
+    def compact(self, max_entries=None, max_bytes=None):
+        """
+        压缩缓存：删除所有过期条目，按最近命中时间淘汰超出容量的条目，并回收数据库文件空间
+
+        Args:
+            max_entries (int, optional): 最大条目数，默认为 cache_manager.CACHE_MAX_ENTRIES
+            max_bytes (int, optional): 最大字节数，默认为 cache_manager.CACHE_MAX_BYTES
+
+        Returns:
+            dict: expired、evicted、bytes_before、bytes_after（含WAL文件）
+        """
+        max_entries = cache_manager.CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        max_bytes = cache_manager.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        files = (self.path, self.path + '-wal')
+        bytes_before = cache_manager._file_size(*files)
+
+        expired = self.expire()
+        with self._lock:
+            # 从最近命中的条目开始累计，超出条目数或字节数上限的部分全部淘汰
+            rows = self._conn.execute(
+                f'SELECT project_name, LENGTH(CAST(summary AS BLOB)) + '
+                f'COALESCE(LENGTH(CAST(project AS BLOB)), 0) FROM summaries ORDER BY {_LRU_ORDER} DESC'
+            ).fetchall()
+            kept_bytes = 0
+            evict = []
+            for index, (key, size) in enumerate(rows):
+                kept_bytes += size
+                if (max_entries > 0 and index >= max_entries) or (max_bytes > 0 and kept_bytes > max_bytes):
+                    evict.append((key,))
+            self._conn.executemany('DELETE FROM summaries WHERE project_name = ?', evict)
+
+        self.flush()
+        with self._lock:
+            self._conn.execute('VACUUM')
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return {
+            'expired': expired,
+            'evicted': len(evict),
+            'bytes_before': bytes_before,
+            'bytes_after': cache_manager._file_size(*files)
+        }
+
+    def flush(self):
+        """
+        提交未提交的写入
+
+        Returns:
+            int: 本次提交的变更行数
+        """
+        with self._lock:
+            self._conn.commit()
+            # total_changes 为连接累计值，与上次提交时的值相减得到本次变更数
+            changed = self._conn.total_changes - self._committed_changes
+            self._committed_changes = self._conn.total_changes
+            return changed
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+def import_json_cache(json_path=None, db_path=None):
+    """
+    将JSON摘要缓存一次性导入SQLite，保留原有时间戳
+
+    Args:
+        json_path (str, optional): JSON缓存路径，默认为 cache_manager.CACHE_FILE
+        db_path (str, optional): SQLite路径，默认为 SQLITE_CACHE_FILE
+
+    Returns:
+        int: 导入的条目数
+    """
+    entries = cache_manager.load_cache(json_path)
+    rows = []
+    for key, project_data in entries.items():
+        try:
+            timestamp = datetime.fromisoformat(project_data.get('timestamp', '')).timestamp()
+        except (TypeError, ValueError):
+            continue
+        project = project_data.get('project')
+        status = project_data.get('status', cache_manager.STATUS_OK)
+        first_failed_at = None
+        if status == cache_manager.STATUS_FAILED:
+            try:
+                first_failed_at = datetime.fromisoformat(project_data.get('first_failed_at', '')).timestamp()
+            except (TypeError, ValueError):
+                first_failed_at = timestamp
+        rows.append((key, project_data.get('summary', ''), timestamp, status,
+                     json.dumps(project, ensure_ascii=False) if project else None,
+                     project_data.get('failures', 1) if first_failed_at else 0, first_failed_at))
+
+    store = SqliteSummaryCache(db_path)
+    with store._lock:
+        store._conn.executemany(
+            'INSERT OR REPLACE INTO summaries (project_name, summary, timestamp, status, project, failures, '
+            'first_failed_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+    store.close()
+    return len(rows)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'import':
+        print(__doc__)
+        sys.exit(1)
+    count = import_json_cache(*sys.argv[2:4])
+    print(f"已导入 {count} 条摘要缓存")
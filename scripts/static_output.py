@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+静态输出后处理
+
+压缩 public 目录下的HTML和CSS（去除注释和缩进），并生成预压缩的 .gz（安装 brotli 时还有 .br）
+文件，供支持预压缩文件的CDN或本地服务器直接使用。内容未变化的文件会被跳过。
+用法:
+    python scripts/static_output.py [输出目录]
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import sys
+
+from cache_manager import load_cache, save_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 是否在生成页面后执行后处理（main.py 中使用）
+STATIC_MINIFY = os.environ.get("STATIC_MINIFY", "0").lower() in ('1', 'true', 'yes')
+# 记录已处理文件内容指纹的清单
+STATIC_MANIFEST_FILE = "data/static_manifest.json"
+# 需要处理的文件类型
+STATIC_EXTENSIONS = ('.html', '.css')
+
+_HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+# 空白敏感的元素原样保留
+_HTML_PRESERVED = re.compile(r'(<(pre|textarea|script)\b.*?</\2>)', re.S | re.I)
+_HTML_STYLE = re.compile(r'(<style\b[^>]*>)(.*?)(</style>)', re.S | re.I)
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+
+def minify_css(css):
+    """去除CSS注释和多余空白"""
+    css = _CSS_COMMENT.sub('', css)
+    css = re.sub(r'\s+', ' ', css)
+    css = _CSS_PUNCTUATION.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_html(html):
+    """
+    去除HTML注释、行首缩进和空行，并压缩内联样式
+
+    行内的空白保持不变，不影响行内元素之间的间距；pre、textarea、script 的内容原样保留。
+    """
+    parts = _HTML_PRESERVED.split(html)
+    result = []
+    # split 的结果依次为：普通文本、保留元素、保留元素的标签名……
+    for index in range(0, len(parts), 3):
+        text = _HTML_COMMENT.sub('', parts[index])
+        text = _HTML_STYLE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), text)
+        result.append('\n'.join(line.strip() for line in text.split('\n') if line.strip()))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return '\n'.join(part for part in result if part)
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _write_bytes(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def optimize_static_dir(out_dir='public', manifest_path=None):
+    """
+    压缩输出目录中的HTML和CSS，并生成预压缩文件
+
+    处理后的内容指纹记录在清单中，下次运行时内容未变化且预压缩文件齐全的文件直接跳过。
+
+    Args:
+        out_dir (str): 输出目录
+        manifest_path (str, optional): 清单路径，默认为 STATIC_MANIFEST_FILE
+
+    Returns:
+        dict: processed、skipped 文件数，以及处理前后的字节数（before、after、gzip、brotli）
+    """
+    manifest_path = manifest_path or STATIC_MANIFEST_FILE
+    manifest = load_cache(manifest_path)
+    encodings = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        encodings.append(('.br', lambda data: brotli.compress(data, quality=11)))
+
+    stats = {'processed': 0, 'skipped': 0, 'before': 0, 'after': 0, 'gzip': 0, 'brotli': 0}
+    for root, _, files in os.walk(out_dir):
+        for filename in files:
+            if not filename.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            key = os.path.relpath(path, out_dir)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            if manifest.get(key) == _content_hash(data) and all(
+                    os.path.exists(path + suffix) for suffix, _ in encodings):
+                stats['skipped'] += 1
+                continue
+
+            text = data.decode('utf-8')
+            minified = (minify_css(text) + '\n' if filename.endswith('.css') else minify_html(text)).encode('utf-8')
+            if minified != data:
+                _write_bytes(path, minified)
+            stats['before'] += len(data)
+            stats['after'] += len(minified)
+            for suffix, compress in encodings:
+                compressed = compress(minified)
+                _write_bytes(path + suffix, compressed)
+                stats['gzip' if suffix == '.gz' else 'brotli'] += len(compressed)
+            manifest[key] = _content_hash(minified)
+            stats['processed'] += 1
+
+    save_cache(manifest, manifest_path)
+    return stats
+
+def print_static_stats(stats):
+    """输出后处理的文件数和字节数统计"""
+    print(f"静态文件后处理: 处理 {stats['processed']} 个，未变化跳过 {stats['skipped']} 个")
+    if stats['processed']:
+        saved = stats['before'] - stats['after']
+        line = (f"  原始 {stats['before']:,} 字节 -> 压缩后 {stats['after']:,} 字节"
+                f"（减少 {saved / stats['before']:.1%}），gzip {stats['gzip']:,} 字节")
+        if stats['brotli']:
+            line += f"，brotli {stats['brotli']:,} 字节"
+        print(line)
+
+if __name__ == "__main__":
+    print_static_stats(optimize_static_dir(*sys.argv[1:2]))
@@ -1,20 +1,31 @@
 import os
-import requests
 from datetime import datetime
 
-def publish_to_wechat(html_content, current_date=None):
+from http_client import RETRYABLE_STATUS_CODES, get_session, request_not_sent
+
+# 推送服务的请求超时时间（秒）
+WECHAT_TIMEOUT = 60
+
+def publish_to_wechat(html_content, current_date=None, timeout=None):
     """
     将GitHub Trending日报推送到微信公众号
     
     Args:
         html_content (str): HTML内容
         current_date (datetime, optional): 统一日期，默认为当前时间
+        timeout (float, optional): 请求超时时间（秒），不超过WECHAT_TIMEOUT
+    
+    Returns:
+        dict: ok（是否成功）、error（失败原因）、retryable（失败是否可重试）
+
+    推送服务没有幂等键，重复请求会发出重复的图文：任何2xx响应都视为成功（不论响应体能否解析），
+    只有确定请求未被处理时（连接未建立、429/503）才标记为可重试。
     """
     if current_date is None:
         current_date = datetime.now()
 
     try:
-        response = requests.post(
+        response = get_session().post(
             os.environ.get("SERVER_URL"),
             headers={"X-Api-Key": os.environ.get("SERVER_API_KEY")},
             json={
@@ -23,8 +34,14 @@ def publish_to_wechat(html_content, current_date=None):
                 "thumb_id": os.environ.get("THUMB_ID"),
                 "digest": "全方位解析今日热门 GitHub 项目：背景、架构与核心特性。"
             },
-            timeout=60
+            timeout=WECHAT_TIMEOUT if timeout is None else min(WECHAT_TIMEOUT, timeout)
         )
-        print(f"微信推送结果: {response.json()}")
     except Exception as e:
         print(f"微信推送失败: {e}")
+        return {"ok": False, "error": str(e), "retryable": request_not_sent(e)}
+
+    print(f"微信推送结果: HTTP {response.status_code} {response.text[:500]}")
+    if 200 <= response.status_code < 300:
+        return {"ok": True, "error": None}
+    return {"ok": False, "error": f"HTTP {response.status_code}",
+            "retryable": response.status_code in RETRYABLE_STATUS_CODES}